@@ -1,11 +1,13 @@
 # pages/00_Signet_Sales.py
 import os
+import numpy as np
 import pandas as pd
 import streamlit as st
 import requests
 import altair as alt
 import plotly.express as px
 from utils.navbar import navbar
+from utils.downloads import csv_bytes
 from streamlit_auth import require_login
 
 require_login()
@@ -30,12 +32,12 @@ def _ensure_metrics(df: pd.DataFrame) -> pd.DataFrame:
     if "margin_pct" not in df.columns and {"retail", "cost"} <= set(df.columns):
         df["retail"] = _to_num(df.get("retail"))
         df["cost"] = _to_num(df.get("cost"))
-        with pd.option_context("mode.use_inf_as_na", True):
-            df["margin_pct"] = (df["retail"] - df["cost"]) / df["retail"]
+        # Zero retail becomes NaN up front, so no inf ever lands in the column
+        df["margin_pct"] = (df["retail"] - df["cost"]) / df["retail"].replace(0, np.nan)
     if "sell_through" not in df.columns and {"total_monthly_sales", "total_on_hand_units"} <= set(df.columns):
         sales = _to_num(df.get("total_monthly_sales"))
         onhand = _to_num(df.get("total_on_hand_units"))
-        df["sell_through"] = (sales / onhand.replace(0, pd.NA)).astype(float)
+        df["sell_through"] = (sales / onhand.replace(0, np.nan)).astype(float)
     return df
 
 # ---------- Data loaders ----------
@@ -69,7 +71,11 @@ def load_signet_local(path: str) -> pd.DataFrame:
         elif ext in (".csv", ".txt"):
             df = pd.read_csv(path)
         elif ext in (".xlsx", ".xls"):
-            df = pd.read_excel(path)
+            try:
+                # Rust-backed reader; much faster than openpyxl building the full cell grid
+                df = pd.read_excel(path, engine="calamine")
+            except ImportError:
+                df = pd.read_excel(path)
         else:
             # attempt parquet then csv
             try:
@@ -107,8 +113,8 @@ if not USE_LOCAL and month_choice != "All":
     # pull filtered directly from API to avoid big payloads
     df = load_signet(month_choice)
 
-# Apply local filters
-dfv = df.copy()
+# Apply local filters (each mask returns a new frame; dfv is never written to, so no upfront copy)
+dfv = df
 if logo_choice != "All":
     dfv = dfv[dfv.get("logo").eq(logo_choice)]
 if cat_choice != "All":
@@ -311,7 +317,7 @@ with st.expander("Preview (first 200 rows)"):
 
 st.download_button(
     "Download current view (CSV)",
-    data=dfv.to_csv(index=False).encode("utf-8"),
+    data=csv_bytes(dfv),
     file_name="signet_current_view.csv",
     mime="text/csv",
 )
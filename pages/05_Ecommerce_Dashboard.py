@@ -5,6 +5,7 @@ import pandas as pd
 import requests
 import plotly.express as px
 from utils.navbar import navbar
+from utils.downloads import csv_bytes
 from streamlit_auth import require_login
 
 require_login()
@@ -37,8 +38,48 @@ except Exception as e:
     st.text(f"Error: {e}")
     st.stop()
 
-# remove Ben Bridge data since its poor
-df_master = df_master[df_master["customer"] != "Ben Bridge"]
+NUMERIC_COLS = ["sales_qty", "sales_amt", "profit", "extended_cost",
+                "avg_unit_price", "avg_unit_cost", "total_inv"]
+
+@st.cache_data(show_spinner=False)
+def prepare_ecomm(df_master):
+    """Clean once per dataset and precompute the per-customer KPI / category tables."""
+    # remove Ben Bridge data since its poor
+    df = df_master[df_master["customer"] != "Ben Bridge"].drop_duplicates()
+
+    # Numeric-safe fields (only convert if present)
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+
+    # Recalculate profit row by row
+    if {"sales_amt", "sales_qty", "avg_unit_cost"} <= set(df.columns):
+        df["profit_calc"] = df["sales_amt"] - (df["sales_qty"] * df["avg_unit_cost"])
+        profit_col = "profit_calc"
+    else:
+        profit_col = "profit"
+
+    sums = {
+        name: (col, "sum")
+        for name, col in [("sales", "sales_amt"), ("units", "sales_qty"),
+                          ("profit", profit_col), ("inv_value", "extended_cost")]
+        if col in df.columns
+    }
+    kpis = df.groupby("customer").agg(**sums) if sums else pd.DataFrame(index=df["customer"].dropna().unique())
+
+    perf = None
+    if {"style_category", "Performance_Category"} <= set(df.columns):
+        perf = (
+            df.groupby(["customer", "style_category", "Performance_Category"])
+            .size().unstack(fill_value=0)
+        )
+
+    # Sorted customer index so selecting a customer is an index slice, not a full equality scan
+    df = df.set_index("customer", drop=False).sort_index(kind="stable")
+    df.index.name = None
+    return df, kpis, perf
+
+df_master, cust_kpis, cust_perf = prepare_ecomm(df_master)
 
 # ---------------- Sidebar ----------------
 # Use the new dataset's customer names directly
@@ -50,31 +91,18 @@ st.sidebar.markdown(
     unsafe_allow_html=True
 )
 
-# ---------------- Filter & numeric safety ----------------
-df_filtered = df_master[df_master["customer"] == customer_selected].copy()
-df_filtered = df_filtered.drop_duplicates()
-
-# Numeric-safe fields (only convert if present)
-for col in ["sales_qty", "sales_amt", "profit", "extended_cost",
-            "avg_unit_price", "avg_unit_cost", "total_inv"]:
-    if col in df_filtered.columns:
-        df_filtered[col] = pd.to_numeric(df_filtered[col], errors="coerce").fillna(0)
-
-# ---------------- KPIs ----------------
-total_sales = df_filtered["sales_amt"].sum() if "sales_amt" in df_filtered else 0
-total_units = df_filtered["sales_qty"].sum() if "sales_qty" in df_filtered else 0
-total_profit = df_filtered["profit"].sum() if "profit" in df_filtered else 0
-
-# Recalculate profit row by row
-if {"sales_amt", "sales_qty", "avg_unit_cost"} <= set(df_filtered.columns):
-    df_filtered["profit_calc"] = df_filtered["sales_amt"] - (df_filtered["sales_qty"] * df_filtered["avg_unit_cost"])
-    total_profit = df_filtered["profit_calc"].sum()
-else:
-    total_profit = df_filtered.get("profit", pd.Series([0])).sum()
+# ---------------- Filter ----------------
+df_filtered = df_master.loc[[customer_selected]]
+
+# ---------------- KPIs (precomputed per customer) ----------------
+kpi_row = cust_kpis.loc[customer_selected]
+total_sales = kpi_row.get("sales", 0)
+total_units = kpi_row.get("units", 0)
+total_profit = kpi_row.get("profit", 0)
 
 profit_pct = (total_profit / total_sales * 100) if total_sales > 0 else 0
 
-inv_value = df_filtered["extended_cost"].sum() if "extended_cost" in df_filtered else 0
+inv_value = kpi_row.get("inv_value", 0)
 
 st.title(f"{customer_selected} Dashboard (1/1/2023 - 9/9/2025)")
 col1, col2, col3, col4 = st.columns(4)
@@ -84,12 +112,15 @@ col3.metric("Profit Margin", f"{profit_pct:.1f}%")
 col4.metric("Inventory Value", f"${inv_value:,.0f}")
 
 # ---------------- Viz 1: Performance by Style Category ----------------
-if "style_category" in df_filtered.columns and "Performance_Category" in df_filtered.columns:
+if cust_perf is not None:
     st.subheader("Performance by Style Category")
     category_summary = (
-        df_filtered.groupby(['style_category', 'Performance_Category'])
-        .size().unstack(fill_value=0)
+        cust_perf.xs(customer_selected, level="customer")
+        if customer_selected in cust_perf.index.get_level_values("customer")
+        else cust_perf.iloc[0:0].droplevel("customer")
     )
+    # keep only the performance categories this customer actually has
+    category_summary = category_summary.loc[:, category_summary.sum() > 0]
     fig1 = px.bar(
         category_summary.reset_index(),
         x='style_category',
@@ -176,7 +207,7 @@ if stock_qty_col and "sales_qty" in df_filtered.columns:
     cols = [c for c in ['style_cd','style_category','sales_qty','sales_amt',
                         stock_qty_col,'avg_unit_cost','avg_unit_price','extended_cost']
             if c in stockouts_sorted.columns]
-    st.dataframe(stockouts_sorted[cols])
+    st.dataframe(stockouts_sorted[cols], hide_index=True)
 else:
     st.info("Need `total_inv` and `sales_qty` for stockout analysis.")
 
@@ -187,7 +218,7 @@ if stock_qty_col and "sales_qty" in df_filtered.columns:
     cols = [c for c in ['style_cd','style_category','sales_qty',stock_qty_col,
                         'avg_unit_cost','avg_unit_price','extended_cost']
             if c in deadweight_sorted.columns]
-    st.dataframe(deadweight_sorted[cols])
+    st.dataframe(deadweight_sorted[cols], hide_index=True)
 else:
     st.info("Need `total_inv` and `sales_qty` for deadweight analysis.")
 
@@ -195,7 +226,7 @@ else:
 st.subheader("⬇️ Download Customer Data")
 st.download_button(
     label="Download Filtered Customer CSV",
-    data=df_filtered.to_csv(index=False),
+    data=csv_bytes(df_filtered),
     file_name=f'{customer_selected}_filtered_data.csv',
     mime='text/csv'
 )
@@ -1,9 +1,14 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
 import requests
 from datetime import datetime
 import plotly.express as px
+import plotly.graph_objects as go
 from utils.navbar import navbar
+from utils.downloads import csv_bytes
+from utils.api_session import get_session
 from streamlit_auth import require_login
 
 require_login()
@@ -37,6 +42,40 @@ def fetch_memo_health():
     r.raise_for_status()
     return r.json()
 
+CATEGORY_COLS = ("AE", "Customer", "Metal Kt", "Performance_Category")
+
+# ----------------------------
+# Type coercions (new column names)
+# ----------------------------
+money_cols = [
+    "Open Memo Amt",
+]
+qty_cols = [
+    "OM 1/1/24",
+    "Shipped Qty 2024-25",
+    "Returned Qty 2024-25",
+    "Net Sales 2024",
+    "Net Sales 2025 YTD",
+    "Net Sales 2026",
+    "Open Memo Qty",
+    "Expected Sales in next 6 months",
+    "Excess",
+    "Sell Through %",  # keep numeric (0-1)
+]
+# Whole-unit stock counts, exact in float32: half the bytes for every sort/sum pass.
+# Forecasts, sales, ratios and dollar amounts can be fractional and stay float64.
+COUNT_COLS = ("OM 1/1/24", "Shipped Qty 2024-25", "Returned Qty 2024-25", "Open Memo Qty")
+
+def to_number(s: pd.Series) -> pd.Series:
+    return pd.to_numeric(
+        s.astype(str)
+         .str.replace(r"[\$,]", "", regex=True)
+         .str.strip(),
+        errors="coerce"
+    )
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
 @st.cache_data(ttl=300)
 def fetch_memo(cust_code=None, department=None, ae=None, performance_category=None, limit=5000):
     """
@@ -52,17 +91,34 @@ def fetch_memo(cust_code=None, department=None, ae=None, performance_category=No
     if performance_category: params["performance_category"] = performance_category
 
     url = f"https://api.anerijewels.com/api/memo"
-    headers = {"X-API-KEY": st.secrets["API_KEY"]}
+    headers = {"Accept": f"{ARROW_STREAM}, application/json;q=0.9"}
 
-    r = requests.get(url, headers=headers, params=params, timeout=60)
+    r = get_session().get(url, headers=headers, params=params, timeout=60)
     r.raise_for_status()
-    payload = r.json()
-
-    rows = payload.get("rows", []) if isinstance(payload, dict) else payload
-    meta = {
-        "total": payload.get("count", len(rows)) if isinstance(payload, dict) else len(rows),
-    }
-    df = pd.DataFrame(rows)
+    if r.headers.get("Content-Type", "").startswith(ARROW_STREAM):
+        # Typed columns straight from the IPC buffer, no json.loads -> dicts -> DataFrame round-trip
+        df = pa.ipc.open_stream(r.content).read_all().to_pandas()
+        meta = {"total": len(df)}
+    else:
+        payload = r.json()
+
+        rows = payload.get("rows", []) if isinstance(payload, dict) else payload
+        meta = {
+            "total": payload.get("count", len(rows)) if isinstance(payload, dict) else len(rows),
+        }
+        df = pd.DataFrame(rows)
+    # Low-cardinality filter columns as categoricals: sidebar .unique()/.isin work on integer codes
+    for c in CATEGORY_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    # Arrow-backed text for the string kernels in normalize_disposition
+    if "Disposition" in df.columns:
+        df["Disposition"] = df["Disposition"].astype("string[pyarrow]")
+    for c in money_cols + qty_cols:
+        if c in df.columns:
+            df[c] = to_number(df[c])
+            if c in COUNT_COLS:
+                df[c] = df[c].astype("float32")
     return meta, df
 
 meta, df = fetch_memo(limit=5000)
@@ -161,32 +217,20 @@ preferred_order = [
 df = df[[c for c in preferred_order if c in df.columns]]
 
 # ----------------------------
-# Type coercions (new column names)
+# Disposition + sort helpers
 # ----------------------------
-money_cols = [
-    "Open Memo Amt",
-]
-qty_cols = [
-    "OM 1/1/24",
-    "Shipped Qty 2024-25",
-    "Returned Qty 2024-25",
-    "Net Sales 2024",
-    "Net Sales 2025 YTD",
-    "Net Sales 2026",
-    "Open Memo Qty",
-    "Expected Sales in next 6 months",
-    "Excess",
-    "Sell Through %",  # keep numeric (0-1)
-]
+DISPOSITION_ORDER = ["Unspecified", "Perpetual Memo", "Hold On Memo/Monitor", "RTV - Closeout", "RTV - Melt"]
 
+@st.cache_data(show_spinner=False)
 def normalize_disposition(s: pd.Series) -> pd.Series:
     """
     Canonicalize disposition values for consistent filtering + analytics.
     Output values are in this set:
       Unspecified, Perpetual Memo, Hold On Memo/Monitor, RTV - Closeout, RTV - Melt, <Other Title Cased>
+    Returned as a categorical (canonical values first) so filters/groupbys compare integer codes.
     """
     s = (
-        s.fillna("").astype(str).str.strip()
+        s.astype("string[pyarrow]").fillna("").str.strip()
          .str.replace(r"\s+", " ", regex=True).str.lower()
     )
 
@@ -204,25 +248,20 @@ def normalize_disposition(s: pd.Series) -> pd.Series:
         "rtv- melt": "RTV - Melt",
     }
 
-    s = s.replace(canon)
+    # Canonical spellings map directly; anything else keeps its own label, title-cased
+    out = s.map(canon).fillna(s.str.title())
 
-    allowed = {"Unspecified", "Perpetual Memo", "Hold On Memo/Monitor", "RTV - Closeout", "RTV - Melt"}
-    s = s.apply(lambda x: x if x in allowed else (x.title() if x else "Unspecified"))
+    others = sorted(set(out.unique()) - set(DISPOSITION_ORDER))
+    return out.astype(pd.CategoricalDtype(DISPOSITION_ORDER + others))
 
-    return s
 
+@st.cache_data(show_spinner=False)
+def sort_positions(values: pd.Series, ascending: bool) -> np.ndarray:
+    """Row positions of `values` in sort order (NaNs last, like sort_values)."""
+    return values.reset_index(drop=True).sort_values(ascending=ascending).index.to_numpy()
 
-def to_number(s: pd.Series) -> pd.Series:
-    return pd.to_numeric(
-        s.astype(str)
-         .str.replace(r"[\$,]", "", regex=True)
-         .str.strip(),
-        errors="coerce"
-    )
 
-for c in money_cols + qty_cols:
-    if c in df.columns:
-        df[c] = to_number(df[c])
+# Numeric coercion (and the float32 counts) happens once in fetch_memo, not on every rerun
 
 # Datetime coercion
 if "Inception Dt." in df.columns:
@@ -236,37 +275,48 @@ if "Date_RA_Issued" in df.columns:
 # ----------------------------
 st.sidebar.header("Filters")
 
+# One fused numpy mask, sliced once at the end; each widget's options still follow the filters above it
+mask = np.ones(len(df), dtype=bool)
+
+def options_for(col):
+    return sorted(df[col][mask].dropna().unique().tolist())
+
 if "AE" in df.columns:
-    ae_selected = st.sidebar.multiselect("Account Executive(s)", sorted(df["AE"].dropna().unique().tolist()))
+    ae_selected = st.sidebar.multiselect("Account Executive(s)", options_for("AE"))
     if ae_selected:
-        df = df[df["AE"].isin(ae_selected)]
+        mask &= df["AE"].isin(ae_selected).to_numpy()
 
 if "Customer" in df.columns:
-    customer_selected = st.sidebar.multiselect("Customer(s)", sorted(df["Customer"].dropna().unique().tolist()))
+    customer_selected = st.sidebar.multiselect("Customer(s)", options_for("Customer"))
     if customer_selected:
-        df = df[df["Customer"].isin(customer_selected)]
+        mask &= df["Customer"].isin(customer_selected).to_numpy()
 
 if "Metal Kt" in df.columns:
-    metal_selected = st.sidebar.multiselect("Metal Type(s)", sorted(df["Metal Kt"].dropna().unique().tolist()))
+    metal_selected = st.sidebar.multiselect("Metal Type(s)", options_for("Metal Kt"))
     if metal_selected:
-        df = df[df["Metal Kt"].isin(metal_selected)]
+        mask &= df["Metal Kt"].isin(metal_selected).to_numpy()
 
 # --- Disposition filter (normalized) ---
 if "Disposition" in df.columns:
     df["_Disp"] = normalize_disposition(df["Disposition"])
-    disp_options = ["All"] + sorted(df["_Disp"].dropna().unique().tolist())
+    disp_options = ["All"] + options_for("_Disp")
     disp_selected = st.sidebar.multiselect("Disposition", disp_options, default=["All"])
     if disp_selected and "All" not in disp_selected:
-        df = df[df["_Disp"].isin(disp_selected)]
+        mask &= df["_Disp"].isin(disp_selected).to_numpy()
 
 
 if "Performance_Category" in df.columns:
     performance_selected = st.sidebar.multiselect(
         "Performance Category",
-        sorted(df["Performance_Category"].dropna().unique().tolist())
+        options_for("Performance_Category")
     )
     if performance_selected:
-        df = df[df["Performance_Category"].isin(performance_selected)]
+        mask &= df["Performance_Category"].isin(performance_selected).to_numpy()
+
+# Keep the unfiltered frame too: the sorted table reuses cached sort orders over it
+df_all = df
+if not mask.all():
+    df = df.loc[mask]
 
 st.sidebar.markdown(
     "<h2 style='text-align: center; color: #4B0082;'>💎 Aneri Jewels 💎</h2>",
@@ -313,7 +363,10 @@ sort_order = st.radio(
 )
 ascending = sort_order == "Ascending"
 
-df_sorted = df.sort_values(by=sort_column, ascending=ascending)
+# Sort order of the full frame is cached per (column, direction); the filtered view keeps
+# the rows of that order that pass the mask
+order = sort_positions(df_all[sort_column], ascending)
+df_sorted = df_all.take(order[mask[order]])
 
 # Columns to show
 base_cols = [
@@ -353,7 +406,8 @@ st.data_editor(
     },
 )
 
-df_filtered = df_sorted.copy()
+# Read-only below (every derived frame is built with assign/loc), so no full-frame copy
+df_filtered = df_sorted
 
 # ----------------------------
 # Pivots
@@ -383,7 +437,7 @@ def stacked_bar_from_pivot(pivot_df: pd.DataFrame, index_name: str, title: str,
 
 if {"AE", "Performance_Category", "Style"}.issubset(df_filtered.columns):
     ae_pivot = df_filtered.pivot_table(
-        index="AE", columns="Performance_Category", values="Style", aggfunc="size", fill_value=0
+        index="AE", columns="Performance_Category", values="Style", aggfunc="size", fill_value=0, observed=True
     )
     ae_group_sorted = ae_pivot.assign(Total=ae_pivot.sum(axis=1)).sort_values("Total", ascending=False)
     stacked_bar_from_pivot(ae_group_sorted, "AE", "AEs by Performance Category", top_n=None)
@@ -392,42 +446,76 @@ top_n = st.slider("Top N Customers", 5, 30, 10, step=1)
 
 if {"Customer", "Performance_Category", "Style"}.issubset(df_filtered.columns):
     customer_pivot = df_filtered.pivot_table(
-        index="Customer", columns="Performance_Category", values="Style", aggfunc="size", fill_value=0
+        index="Customer", columns="Performance_Category", values="Style", aggfunc="size", fill_value=0, observed=True
     )
     customer_group_sorted = customer_pivot.assign(Total=customer_pivot.sum(axis=1)).sort_values("Total", ascending=False)
     stacked_bar_from_pivot(customer_group_sorted, "Customer", "Top Customers by Count", top_n=top_n)
 # ----------------------------
 # Dispositions Analytics (ported from old page)
 # ----------------------------
+# Figure specs are cached per grouped frame + metric, so unrelated reruns skip the Plotly build
+@st.cache_data(show_spinner=False)
+def disposition_pie(g_disp: pd.DataFrame, value_col: str, metric: str) -> dict:
+    return px.pie(
+        g_disp,
+        names="_Disposition",
+        values=value_col,
+        hole=0.35,
+        title=f"Disposition Mix — {metric}"
+    ).to_dict()
+
+@st.cache_data(show_spinner=False)
+def disposition_by_ae_bar(g_ae: pd.DataFrame, value_col: str, metric: str) -> dict:
+    return px.bar(
+        g_ae,
+        x="AE",
+        y=value_col,
+        color="_Disposition",
+        barmode="stack",
+        title=f"Dispositions by AE — {metric}"
+    ).to_dict()
+
 st.subheader("Dispositions Analytics")
 
 if "Disposition" not in df_filtered.columns:
     st.info("No 'Disposition' column found in the current dataset.")
 else:
-    df_analytics = df_filtered.copy()
-    df_analytics["_Disposition"] = normalize_disposition(df_analytics["Disposition"])
+    # Narrow frame: only the columns the analytics and the pending table read
+    analytics_cols = [c for c in [
+        "AE", "Customer", "Style", "Style Description",
+        "Open Memo Qty", "Open Memo Amt", "Inception Dt.", "RA_Issued"
+    ] if c in df_filtered.columns]
 
     # Amount column in your new schema
-    amt_col = "Open Memo Amt" if "Open Memo Amt" in df_analytics.columns else None
-    if amt_col:
-        df_analytics["_Amt"] = pd.to_numeric(df_analytics[amt_col], errors="coerce")
-    else:
-        df_analytics["_Amt"] = 0.0
+    amt_col = "Open Memo Amt" if "Open Memo Amt" in df_filtered.columns else None
+    df_analytics = df_filtered[analytics_cols].assign(
+        _Disposition=df_filtered["_Disp"],
+        _Amt=pd.to_numeric(df_filtered[amt_col], errors="coerce") if amt_col else 0.0,
+    )
+
+    # Line count + amount per (AE, disposition) in one grouped pass; the per-disposition
+    # totals behind the KPI cards and the pie are a roll-up of it, the AE bar reads it as-is
+    has_ae = "AE" in df_analytics.columns
+    by_ae = (
+        df_analytics.groupby(["AE", "_Disposition"] if has_ae else ["_Disposition"], dropna=False, observed=True)["_Amt"]
+        .agg(Count="size", Amt="sum")
+    )
+    disp_stats = by_ae.groupby(level="_Disposition", observed=True).sum()
+    rtv_stats = disp_stats[disp_stats.index.str.startswith("RTV")]
 
     total_lines = len(df_analytics)
-    unspecified_ct = int((df_analytics["_Disposition"] == "Unspecified").sum())
+    unspecified_ct = int(disp_stats["Count"].get("Unspecified", 0))
     assigned_ct = total_lines - unspecified_ct
     completion = 0 if total_lines == 0 else round(100 * assigned_ct / total_lines, 1)
 
-    rtv_mask = df_analytics["_Disposition"].str.startswith("RTV", na=False)
-    rtv_ct = int(rtv_mask.sum())
-    rtv_amt = float(df_analytics.loc[rtv_mask, "_Amt"].sum())
+    rtv_ct = int(rtv_stats["Count"].sum())
+    rtv_amt = float(rtv_stats["Amt"].sum())
 
-    hold_ct = int((df_analytics["_Disposition"] == "Hold On Memo/Monitor").sum())
-    hold_amt = float(df_analytics.loc[df_analytics["_Disposition"] == "Hold On Memo/Monitor", "_Amt"].sum())
+    hold_ct = int(disp_stats["Count"].get("Hold On Memo/Monitor", 0))
+    hold_amt = float(disp_stats["Amt"].get("Hold On Memo/Monitor", 0.0))
 
-    perp_ct = int((df_analytics["_Disposition"] == "Perpetual Memo").sum())
-    perp_amt = float(df_analytics.loc[df_analytics["_Disposition"] == "Perpetual Memo", "_Amt"].sum())
+    perp_ct = int(disp_stats["Count"].get("Perpetual Memo", 0))
+    perp_amt = float(disp_stats["Amt"].get("Perpetual Memo", 0.0))
 
     k1, k2, k3, k4, k5 = st.columns(5)
     k1.metric("Total Lines", f"{total_lines:,}")
@@ -439,37 +527,13 @@ else:
     metric = st.radio("Metric", ["Count", "Open Memo Amt ($)"], horizontal=True, index=0)
     value_col = "Count" if metric == "Count" else "Amt"
 
-    g_disp = (
-        df_analytics.groupby("_Disposition", dropna=False)
-        .agg(Count=("Style", "size"), Amt=("_Amt", "sum"))
-        .reset_index()
-        .sort_values(value_col, ascending=False)
-    )
+    g_disp = disp_stats.reset_index().sort_values(value_col, ascending=False)
 
-    pie = px.pie(
-        g_disp,
-        names="_Disposition",
-        values=value_col,
-        hole=0.35,
-        title=f"Disposition Mix — {metric}"
-    )
-    st.plotly_chart(pie, use_container_width=True)
+    st.plotly_chart(go.Figure(disposition_pie(g_disp, value_col, metric)), use_container_width=True)
 
-    if "AE" in df_analytics.columns:
-        g_ae = (
-            df_analytics.groupby(["AE", "_Disposition"], dropna=False)
-            .agg(Count=("Style", "size"), Amt=("_Amt", "sum"))
-            .reset_index()
-        )
-        bar = px.bar(
-            g_ae,
-            x="AE",
-            y=value_col,
-            color="_Disposition",
-            barmode="stack",
-            title=f"Dispositions by AE — {metric}"
-        )
-        st.plotly_chart(bar, use_container_width=True)
+    if has_ae:
+        g_ae = by_ae.reset_index()
+        st.plotly_chart(go.Figure(disposition_by_ae_bar(g_ae, value_col, metric)), use_container_width=True)
 
     show_pending = st.checkbox("Show Table of Items Requiring Disposition", value=False)
     pending = df_analytics[df_analytics["_Disposition"] == "Unspecified"]
@@ -488,7 +552,7 @@ else:
 
         st.download_button(
             "📥 Download Unspecified Items (CSV)",
-            data=pending[cols_show].to_csv(index=False),
+            data=csv_bytes(pending[cols_show]),
             file_name=f"SlowMemo_Unspecified_{datetime.today().strftime('%Y-%m-%d')}.csv",
             mime="text/csv"
         )
@@ -501,7 +565,7 @@ st.subheader("RA Activity")
 if "Date_RA_Issued" not in df_filtered.columns:
     st.info("No Date_RA_Issued column available.")
 else:
-    ra_df = df_filtered.loc[df_filtered["Date_RA_Issued"].notna()].copy()
+    ra_df = df_filtered.loc[df_filtered["Date_RA_Issued"].notna()]
 
     c1, c2, c3 = st.columns(3)
     total_ras = len(ra_df)
@@ -571,9 +635,7 @@ work_cols_pref = [
 ]
 work_cols = [c for c in work_cols_pref if c in df_filtered.columns]
 
-work_df = df_filtered.copy()
-if "Disposition" in work_df.columns:
-    work_df["_Disp"] = normalize_disposition(work_df["Disposition"])
+work_df = df_filtered
 
 hide_unspecified = st.checkbox("Hide Unspecified", value=False)
 
@@ -598,7 +660,7 @@ if work_cols:
 
     st.download_button(
         "📥 Download Worklist (CSV)",
-        data=work_df[work_cols].to_csv(index=False),
+        data=csv_bytes(work_df[work_cols]),
         file_name=f"SlowMemo_Worklist_{datetime.today().strftime('%Y-%m-%d')}.csv",
         mime="text/csv"
     )
@@ -613,7 +675,7 @@ st.subheader("📥 Export current view")
 csv_name = f"SlowMemo_filtered_{datetime.today().strftime('%Y-%m-%d')}.csv"
 st.download_button(
     label="Download filtered CSV",
-    data=df_filtered.to_csv(index=False),
+    data=csv_bytes(df_filtered),
     file_name=csv_name,
     mime="text/csv"
 )
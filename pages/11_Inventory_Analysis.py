@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import numpy as np
 import requests
+from datetime import date
 from utils.navbar import navbar
 from streamlit_auth import require_login
 
@@ -24,12 +26,34 @@ st.title("Inventory Analysis")
 
 unit = st.selectbox("Select Business Unit", ["Sumit", "EDB", "Newlite"])
 
+# Columns this page reads (API names + legacy names); sent as `fields` so the API can skip the rest
+INVENTORY_FIELDS = [
+    "Style no.", "Style Description", "Jewelry Category", "Metal Type", "Vendor",
+    "Selling Price", "Current Cost", "Last sold date", "Created on", "Days since last sold",
+    "Units in Repair", "Units in CRET", "Units in QC", "Units in RTS", "Units on Memo",
+    "Metal Cost", "Diamond Cost", "Labor Cost", "Duty Cost", "Finding Cost",
+    "On hand $", "On memo $", "RTS $", "Style Image", "ECOMM",
+    "Casting Weight (g)", "CTTW",
+    # Legacy-schema names that normalize_inventory() accepts as-is
+    "style_cd", "style_desc", "style_category", "metal_typ", "vendor_id",
+    "selling_price", "total_cost", "last_sold_dt", "created_on", "days_since_last_sold",
+    "metal_cost", "diamond_cost", "total_labor_cost", "costfor_duty1", "finding_cost",
+    "image_url", "ecomm",
+    "REP", "CRET", "QC", "RTS", "OM",
+    "dept", "total_metal_wt", "diamond_wt", "image_cost", "melt_value",
+]
+
 # Load dataset
 @st.cache_data
 def load_inventory(unit):
     url = f"https://api.anerijewels.com/api/inventory/"
     headers = {"X-API-KEY": st.secrets["API_KEY"]}
-    params = {"unit": unit.lower(), "dataset": "analytics", "limit": 50000}
+    params = {
+        "unit": unit.lower(),
+        "dataset": "analytics",
+        "limit": 50000,
+        "fields": ",".join(INVENTORY_FIELDS),
+    }
     res = requests.get(url, headers=headers, params=params, timeout=120)
     res.raise_for_status()
     return pd.DataFrame(res.json())
@@ -46,18 +70,6 @@ def load_local(unit):
         st.write("Please select business unit to begin.")
     return pd.read_csv(csv_path)
 
-try:
-    if use_local:
-        df = load_local(unit)
-    else:
-        df = load_inventory(unit)
-
-
-except Exception as e:
-    st.error("❌ Failed to load data.")
-    st.text(f"Error: {e}")
-    st.stop()
-
 # =========================
 # Normalize to legacy column names expected by this page
 # =========================
@@ -73,14 +85,6 @@ RENAME_MAP = {
     "Created on": "created_on",
 }
 
-# Apply renames where present
-df = df.rename(columns={k: v for k, v in RENAME_MAP.items() if k in df.columns})
-
-# Ensure key text columns are strings (prevents .str errors)
-for c in ["style_cd", "style_desc", "style_category", "metal_typ", "vendor_id"]:
-    if c in df.columns:
-        df[c] = df[c].astype(str).str.strip()
-
 # Department columns: map new unit columns -> legacy dept codes used by the dashboard
 DEPT_MAP = {
     "Units in Repair": "REP",
@@ -89,9 +93,6 @@ DEPT_MAP = {
     "Units in RTS": "RTS",
     "Units on Memo": "OM",
 }
-for src, dst in DEPT_MAP.items():
-    if src in df.columns and dst not in df.columns:
-        df[dst] = pd.to_numeric(df[src], errors="coerce").fillna(0)
 
 # Costs: map new cost columns -> legacy names used by downstream logic
 COST_MAP = {
@@ -102,31 +103,51 @@ COST_MAP = {
     # Finding Cost exists but is not used by your current page; keep if you want:
     "Finding Cost": "finding_cost",
 }
-for src, dst in COST_MAP.items():
-    if src in df.columns and dst not in df.columns:
-        df[dst] = pd.to_numeric(df[src], errors="coerce")
 
-# Selling price / total cost numeric coercion
-for c in ["selling_price", "total_cost", "metal_cost", "diamond_cost", "total_labor_cost", "costfor_duty1", "finding_cost"]:
-    if c in df.columns:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
+def normalize_inventory(df: pd.DataFrame) -> pd.DataFrame:
+    # Apply renames where present
+    df = df.rename(columns={k: v for k, v in RENAME_MAP.items() if k in df.columns})
 
-# Dates
-for c in ["last_sold_dt", "created_on"]:
-    if c in df.columns:
-        df[c] = pd.to_datetime(df[c], errors="coerce")
+    # Ensure key text columns are strings (prevents .str errors)
+    for c in ["style_cd", "style_desc", "style_category", "metal_typ", "vendor_id"]:
+        if c in df.columns:
+            df[c] = df[c].astype(str).str.strip()
 
-# Optional: keep your existing "Days since last sold" under a legacy-friendly name if needed later
-if "Days since last sold" in df.columns and "days_since_last_sold" not in df.columns:
-    df["days_since_last_sold"] = pd.to_numeric(df["Days since last sold"], errors="coerce")
+    # Department columns: map new unit columns -> legacy dept codes used by the dashboard
+    for src, dst in DEPT_MAP.items():
+        if src in df.columns and dst not in df.columns:
+            df[dst] = pd.to_numeric(df[src], errors="coerce").fillna(0)
 
-# Image column for later (if you want to show it)
-if "Style Image" in df.columns and "image_url" not in df.columns:
-    df["image_url"] = df["Style Image"].astype(str).str.strip()
+    # Costs: map new cost columns -> legacy names used by downstream logic
+    for src, dst in COST_MAP.items():
+        if src in df.columns and dst not in df.columns:
+            df[dst] = pd.to_numeric(df[src], errors="coerce")
 
-# ECOMM to bool-ish
-if "ECOMM" in df.columns and "ecomm" not in df.columns:
-    df["ecomm"] = df["ECOMM"].astype(str).str.strip().str.upper().isin(["Y", "YES", "TRUE", "1"])
+    # Selling price / total cost numeric coercion
+    for c in ["selling_price", "total_cost", "metal_cost", "diamond_cost", "total_labor_cost", "costfor_duty1", "finding_cost"]:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+
+    # Dates
+    for c in ["last_sold_dt", "created_on"]:
+        if c in df.columns:
+            df[c] = pd.to_datetime(df[c], errors="coerce")
+
+    # Optional: keep your existing "Days since last sold" under a legacy-friendly name if needed later
+    if "Days since last sold" in df.columns and "days_since_last_sold" not in df.columns:
+        df["days_since_last_sold"] = pd.to_numeric(df["Days since last sold"], errors="coerce")
+
+    # Image column for later (if you want to show it)
+    if "Style Image" in df.columns and "image_url" not in df.columns:
+        df["image_url"] = df["Style Image"].astype(str).str.strip()
+
+    # ECOMM to bool-ish
+    if "ECOMM" in df.columns and "ecomm" not in df.columns:
+        df["ecomm"] = df["ECOMM"].astype(str).str.strip().str.upper().isin(["Y", "YES", "TRUE", "1"])
+
+    df = coerce_numeric(df, NUMERIC_COLS_CANDIDATES)
+    df = parse_dates(df, DATE_COLS)
+    return df
 
 # ----------------------
 # Helpers & Config
@@ -151,6 +172,10 @@ LOCK_COLS = ["gold_lock", "silver_lock", "platinum_lock", "palladium_lock"]
 # Department columns relevant for quantity/value computation
 dept_cols = ["REP", "CRET", "QC", "RTS", "OM"]
 
+# Number formats applied by the front-end (st.column_config) instead of pandas Styler
+DOLLAR_COL = st.column_config.NumberColumn(format="dollar")
+COUNT_COL = st.column_config.NumberColumn(format="localized")
+
 def coerce_numeric(df: pd.DataFrame, columns):
     for c in columns:
         if c in df.columns:
@@ -166,22 +191,65 @@ def parse_dates(df: pd.DataFrame, columns):
 def yesish_to_bool(series: pd.Series) -> pd.Series:
     return series.astype(str).str.strip().str.upper().isin(["Y", "YES", "TRUE", "1"])
 
+def quantile_select(arr: np.ndarray, q: float) -> float:
+    """Linear-interpolated quantile (same as Series.quantile) via O(n) selection instead of a full sort."""
+    n = len(arr)
+    if n == 0:
+        return np.nan
+    pos = q * (n - 1)
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, n - 1)
+    part = np.partition(arr, [lo, hi])
+    return float(part[lo] + (part[hi] - part[lo]) * (pos - lo))
+
 def safe_value_counts(df, col):
     vc = df[col].value_counts()
     out = vc.reset_index()
     out.columns = [col, "styles"]
     return out
 
-df = coerce_numeric(df, NUMERIC_COLS_CANDIDATES)
-df = parse_dates(df, DATE_COLS)
+# Cleaned API frame is pickled to disk so process restarts skip the API call and coercion.
+# Persisted caches ignore ttl, so each entry carries the day it was fetched; a stale day clears
+# the cache, which keeps one pickle per unit on disk instead of piling up one per day.
+@st.cache_data(persist="disk", show_spinner=False)
+def load_clean(unit):
+    return date.today().isoformat(), normalize_inventory(load_inventory(unit))
+
+as_of = date.today().isoformat()
+try:
+    if use_local:
+        # Local files are read uncached, so edits show up on the next rerun
+        df = normalize_inventory(load_local(unit))
+        data_key = None
+    else:
+        fetched_on, df = load_clean(unit)
+        if fetched_on != as_of:
+            # load_inventory is cached in memory too; clear both so the refetch is real
+            load_clean.clear()
+            load_inventory.clear()
+            fetched_on, df = load_clean(unit)
+        data_key = f"api:{fetched_on}"
+except Exception as e:
+    st.error("❌ Failed to load data.")
+    st.text(f"Error: {e}")
+    st.stop()
 
 # ----------------------
 # Sidebar Filters
 # ----------------------
 st.sidebar.header("Filters")
 
-cats = sorted(df["style_category"].dropna().unique()) if "style_category" in df.columns else []
-metals = sorted(df["metal_typ"].dropna().unique()) if "metal_typ" in df.columns else []
+def option_lists(df):
+    cats = sorted(df["style_category"].dropna().unique()) if "style_category" in df.columns else []
+    metals = sorted(df["metal_typ"].dropna().unique()) if "metal_typ" in df.columns else []
+    return cats, metals
+
+# Sorted option lists only change when the dataset does, so compute them once per unit and fetch
+@st.cache_data(show_spinner=False)
+def sidebar_options(unit, data_key, _df):
+    return option_lists(_df)
+
+cats, metals = option_lists(df) if use_local else sidebar_options(unit, data_key, df)
 deps = sorted([c for c in dept_cols if c in df.columns])
 
 #vendors = sorted(df["vendor_id"].dropna().unique()) if "vendor_id" in df.columns else []
@@ -221,11 +289,14 @@ else:
 
 #stale_threshold = st.sidebar.slider("Stale if updated > N days", 0, 730, 180)
 
-filtered = df.copy()
+# Masks below return new frames and the explicit copy before the value columns are written
+# comes further down, so the cached frame is not duplicated here
+filtered = df
 
-if sel_cats:
+# "All" resolves to the full option list, which would match every row — skip the isin pass then
+if sel_cats and len(sel_cats) < len(cats):
     filtered = filtered[filtered["style_category"].isin(sel_cats)]
-if sel_metals:
+if sel_metals and len(sel_metals) < len(metals):
     filtered = filtered[filtered["metal_typ"].isin(sel_metals)]
 if sel_deps:
     dep_num = filtered[sel_deps].apply(pd.to_numeric, errors="coerce")
@@ -239,8 +310,9 @@ if "selling_price" in filtered.columns and pr_hi > 0:
 
 cap_outliers = st.sidebar.checkbox("Exclude top 1% outliers", value=True)
 if cap_outliers:
-    q_hi = filtered["selling_price"].quantile(0.99)
-    filtered_viz = filtered[filtered["selling_price"] <= q_hi]
+    prices = filtered["selling_price"].to_numpy(dtype=float)
+    q_hi = quantile_select(prices[~np.isnan(prices)], 0.99)
+    filtered_viz = filtered[prices <= q_hi]
 else:
     filtered_viz = filtered
 
@@ -273,33 +345,7 @@ for c in money_cols:
     if c in filtered.columns:
         filtered[c] = pd.to_numeric(filtered[c], errors="coerce").fillna(0)
 
-# "Operational quantity" (for filtering / pipeline visibility) — keep as SUM if you want
-# This is NOT used for valuation anymore.
-active_deps_for_qty = [d for d in sel_deps if d in dept_cols_valid]
-if not active_deps_for_qty:
-    active_deps_for_qty = dept_cols_valid
-
-filtered["total_quantity"] = filtered[active_deps_for_qty].sum(axis=1)
-
-# Value = authoritative dollars (no double counting)
-filtered["total_value"] = 0
-if "On hand $" in filtered.columns:
-    filtered["total_value"] += filtered["On hand $"]
-if "On memo $" in filtered.columns:
-    filtered["total_value"] += filtered["On memo $"]
-if "RTS $" in filtered.columns:
-    filtered["total_value"] += filtered["RTS $"]
-
-# Cost per piece (optional, for KPIs)
-# Use Current Cost if present
-if "Current Cost" in filtered.columns:
-    filtered["Current Cost"] = pd.to_numeric(filtered["Current Cost"], errors="coerce")
-    filtered["component_sum"] = filtered["Current Cost"]
-else:
-    filtered["component_sum"] = np.nan
-
 # --- Coerce numeric ---
-filtered[dept_cols_valid] = filtered[dept_cols_valid].apply(pd.to_numeric, errors="coerce").fillna(0)
 for c in cost_cols_core:
     if c in filtered.columns:
         filtered[c] = pd.to_numeric(filtered[c], errors="coerce").fillna(0)
@@ -311,19 +357,14 @@ if not active_deps_for_qty:
     # Fallback: if nothing is selected for some reason, use all dept columns present
     active_deps_for_qty = dept_cols_valid
 
-# --- Compute total quantity using only the active department columns ---
-filtered["total_quantity"] = filtered[active_deps_for_qty].sum(axis=1)
-
-# --- Compute component sum and values ---
-filtered["component_sum"] = (
-    filtered["metal_cost"]
-    + filtered["diamond_cost"]
-    + filtered["total_labor_cost"]
-    + filtered["costfor_duty1"]
-    + filtered["finding_cost"]
-)
+# --- Quantity, component sum and value in one pass over contiguous float arrays ---
+# (quantity only counts the active department columns)
+qty = filtered[active_deps_for_qty].to_numpy(dtype=float).sum(axis=1)
+component_sum = filtered[cost_cols_core].to_numpy(dtype=float).sum(axis=1)
 
-filtered["total_value"] = filtered["component_sum"] * filtered["total_quantity"]
+filtered["total_quantity"] = qty
+filtered["component_sum"] = component_sum
+filtered["total_value"] = component_sum * qty
 
 
 # --- KPI Cards ---
@@ -336,14 +377,19 @@ k4.metric("Median Cost / Piece", f"${filtered['component_sum'].median():,.2f}")
 k5.metric("Total Value", f"${filtered['total_value'].sum():,.0f}")
 
 # ----------------------
-# Tabs
+# Views
 # ----------------------
-tab_overview, tab_value, tab_comp, tab_dept, tab_costcomp, tab_vendor, tab_pricing, tab_drill = st.tabs(
-    ["Overview", "Value Analysis", "Cost Components", "Department", "Cost Composition", "Vendors", "Pricing Bands", "Style Search"]
+# st.tabs runs every tab body on each rerun; a radio lets us build only the active view's charts
+active_tab = st.radio(
+    "View",
+    ["Overview", "Value Analysis", "Cost Components", "Department", "Cost Composition", "Vendors", "Pricing Bands", "Style Search"],
+    horizontal=True,
+    key="active_tab",
+    label_visibility="collapsed",
 )
 
 # ---- Overview ----
-with tab_overview:
+if active_tab == "Overview":
     st.subheader("Distribution by Category & Metal")
     colA, colB = st.columns(2)
     # --- Style Category Summary ---
@@ -358,8 +404,9 @@ with tab_overview:
         )
         cat_summary["Total_Quantity"] = cat_summary["Total_Quantity"].round(0).astype(int)
         colA.dataframe(
-            cat_summary.style.format({"Total_Quantity": "{:,}"}),
+            cat_summary,
             use_container_width=True,
+            column_config={"Total_Quantity": COUNT_COL},
         )
     else:
         colA.info("No style_category or total_quantity column found.")
@@ -376,8 +423,9 @@ with tab_overview:
         )
         metal_summary["Total_Quantity"] = metal_summary["Total_Quantity"].round(0).astype(int)
         colB.dataframe(
-            metal_summary.style.format({"Total_Quantity": "{:,}"}),
+            metal_summary,
             use_container_width=True,
+            column_config={"Total_Quantity": COUNT_COL},
         )
     else:
         colB.info("No metal_typ or total_quantity column found.")
@@ -414,19 +462,20 @@ with tab_overview:
         st.info("💡 Tip: Click any column header to sort by it.")
 
         st.dataframe(
-            top_styles.style.format({
-                "selling_price": "${:,.2f}",
-                "total_cost": "${:,.2f}",
-                "total_value": "${:,.0f}",
-                "total_quantity": "{:,.0f}"
-            }),
+            top_styles,
             use_container_width=True,
+            column_config={
+                "selling_price": DOLLAR_COL,
+                "total_cost": DOLLAR_COL,
+                "total_value": DOLLAR_COL,
+                "total_quantity": COUNT_COL,
+            },
         )
 
     else:
         st.info("Required columns ('total_cost', 'selling_price', 'total_value', 'total_quantity') not found.")
 
-with tab_value:
+if active_tab == "Value Analysis":
     st.header("Value Analysis")
 
     # --- Breakdown by Style Category ---
@@ -485,7 +534,7 @@ with tab_value:
         st.info("Required columns ('style_category', 'metal_typ', 'total_value') not found.")
 
 # ---- Cost Components ----
-with tab_comp:
+if active_tab == "Cost Components":
     st.subheader("Cost Components (Absolute Values Only)")
 
     comp_cols = [c for c in ["metal_cost", "diamond_cost", "total_labor_cost"] if c in filtered.columns]
@@ -500,19 +549,12 @@ with tab_comp:
                 .rename(columns={c: f"median_{c}" for c in comp_cols})
             )
 
-            # --- Numeric formatting map ---
-            numeric_fmt = {
-                f"median_{c}": "${:,.2f}" for c in comp_cols
-            }
-
-            # --- Apply numeric formatting ---
-            comp_fmt = comp_summary.copy()
-            for col, fmt in numeric_fmt.items():
-                if col in comp_fmt.columns:
-                    comp_fmt[col] = comp_fmt[col].apply(lambda x: fmt.format(x) if pd.notnull(x) else "")
-
-            # --- Display formatted dataframe ---
-            st.dataframe(comp_fmt, use_container_width=True)
+            # --- Display with front-end formatting ---
+            st.dataframe(
+                comp_summary,
+                use_container_width=True,
+                column_config={f"median_{c}": DOLLAR_COL for c in comp_cols},
+            )
 
         # --- Scatter plots (selling price relationships) ---
         if "selling_price" in filtered.columns:
@@ -530,9 +572,12 @@ with tab_comp:
 
         # --- Distributions ---
         st.markdown("#### Component Distributions")
+        # Bin server-side so only 40 bars go to the browser instead of every raw value
         for col in comp_cols:
-            fig = px.histogram(filtered_viz, x=col, nbins=40, title=f"Distribution of {col}")
-            fig.update_layout(bargap=0.2)
+            values = filtered_viz[col].dropna().to_numpy(dtype=float)
+            counts, edges = np.histogram(values, bins=40)
+            fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts))
+            fig.update_layout(title=f"Distribution of {col}", xaxis_title=col, yaxis_title="count", bargap=0.2)
             st.plotly_chart(fig, use_container_width=True)
 
     else:
@@ -540,7 +585,7 @@ with tab_comp:
 
 
 # ---- Department Breakdown ----
-with tab_dept:
+if active_tab == "Department":
     st.header("Department Breakdown")
     st.caption("Analyze total inventory value distribution across departments and style categories.")
 
@@ -624,9 +669,12 @@ with tab_dept:
         # --- Table Summary ---
         st.subheader("Department Summary")
         st.dataframe(
-            dept_summary[["Department", "Total Value", "% of Total"]]
-            .style.format({"Total Value": "${:,.0f}", "% of Total": "{:.2f}%"}),
+            dept_summary[["Department", "Total Value", "% of Total"]],
             use_container_width=True,
+            column_config={
+                "Total Value": DOLLAR_COL,
+                "% of Total": st.column_config.NumberColumn(format="%.2f%%"),
+            },
         )
 
         # --- Legend ---
@@ -637,7 +685,7 @@ with tab_dept:
             st.dataframe(legend_df, use_container_width=True)
 
 # ---- Cost Composition Breakdown ----
-with tab_costcomp:
+if active_tab == "Cost Composition":
     st.header("Cost Composition Breakdown")
 
     st.caption("Interactive cost breakdown by style. Toggle cost components to see adjusted totals.")
@@ -700,22 +748,23 @@ with tab_costcomp:
 
 
     # --- Formatting ---
-    numeric_fmt = {
-        "total_quantity": "{:,.0f}",
-        "total_metal_wt": "{:,.2f}",
-        "metal_cost": "${:,.2f}",
-        "diamond_wt": "{:,.2f}",
-        "diamond_cost": "${:,.2f}",
-        "total_labor_cost": "${:,.2f}",
-        "finding_cost": "${:,.2f}",
-        "costfor_duty1": "${:,.2f}",
-        "image_cost": "${:,.2f}",
-        "Total_Amount": "${:,.2f}",
+    numeric_config = {
+        "total_quantity": COUNT_COL,
+        "total_metal_wt": st.column_config.NumberColumn(format="%.2f"),
+        "metal_cost": DOLLAR_COL,
+        "diamond_wt": st.column_config.NumberColumn(format="%.2f"),
+        "diamond_cost": DOLLAR_COL,
+        "total_labor_cost": DOLLAR_COL,
+        "finding_cost": DOLLAR_COL,
+        "costfor_duty1": DOLLAR_COL,
+        "image_cost": DOLLAR_COL,
+        "Total_Amount": DOLLAR_COL,
     }
 
     st.dataframe(
-        table_with_total.style.format(numeric_fmt, na_rep="-"),
+        table_with_total,
         use_container_width=True,
+        column_config=numeric_config,
     )
 
     # --- Totals × Quantity ---
@@ -746,12 +795,13 @@ with tab_costcomp:
     table_2_final = pd.concat([subtotal_2, table_2], ignore_index=True)
 
     st.dataframe(
-        table_2_final.style.format(numeric_fmt, na_rep="-"),
+        table_2_final,
         use_container_width=True,
+        column_config=numeric_config,
     )
 
 # ---- Vendors ----
-with tab_vendor:
+if active_tab == "Vendors":
     st.subheader("Vendor Summary")
 
     if "vendor_id" in filtered.columns:
@@ -759,11 +809,12 @@ with tab_vendor:
         extra = [c for c in ["selling_price", "metal_cost", "diamond_cost", "total_labor_cost"] if c in filtered.columns]
 
         # --- Numeric formatting map ---
-        numeric_fmt = {
-            "selling_price": "${:,.2f}",
-            "metal_cost": "${:,.2f}",
-            "diamond_cost": "${:,.2f}",
-            "total_labor_cost": "${:,.2f}",
+        numeric_config = {
+            "styles": COUNT_COL,
+            "selling_price": DOLLAR_COL,
+            "metal_cost": DOLLAR_COL,
+            "diamond_cost": DOLLAR_COL,
+            "total_labor_cost": DOLLAR_COL,
         }
 
         # --- Build aggregation dictionary ---
@@ -779,18 +830,8 @@ with tab_vendor:
             .sort_values("styles", ascending=False)
         )
 
-        # --- Apply numeric formatting ---
-        vendor_fmt = vendor_summary.copy()
-        for col, fmt in numeric_fmt.items():
-            if col in vendor_fmt.columns:
-                vendor_fmt[col] = vendor_fmt[col].apply(lambda x: fmt.format(x) if pd.notnull(x) else "")
-
-        # --- Format styles count with commas ---
-        if "styles" in vendor_fmt.columns:
-            vendor_fmt["styles"] = vendor_fmt["styles"].apply(lambda x: f"{x:,.0f}" if pd.notnull(x) else "")
-
         # --- Display dataframe ---
-        st.dataframe(vendor_fmt, use_container_width=True)
+        st.dataframe(vendor_summary, use_container_width=True, column_config=numeric_config)
 
         # --- Plot top vendors ---
         if "styles" in vendor_summary.columns:
@@ -805,7 +846,7 @@ with tab_vendor:
         st.info("No vendor_id column.")
 
 # ---- Pricing Bands ----
-with tab_pricing:
+if active_tab == "Pricing Bands":
     st.subheader("Pricing Bands & Mix")
     if "selling_price" in filtered_viz.columns:
         bins = st.selectbox("Price Bins", ["$50", "$100", "$250", "$500", "$1000", "Custom"], index=2)
@@ -818,7 +859,12 @@ with tab_pricing:
         max_price = int(np.nanmax(filtered_viz["selling_price"])) if filtered_viz["selling_price"].notna().any() else 0
         edges = list(range(0, max_price + step, step)) if max_price else [0, step]
         labels = [f"${edges[i]}–${edges[i+1]-1}" for i in range(len(edges)-1)]
-        filtered_viz["price_band"] = pd.cut(filtered_viz["selling_price"], bins=edges, labels=labels, include_lowest=True)
+        # Right-closed bins (lowest edge included) via one binary search; same codes pd.cut would give
+        price = filtered_viz["selling_price"].to_numpy(dtype=float)
+        codes = np.searchsorted(np.asarray(edges, dtype=float), price, side="left") - 1
+        codes[price == edges[0]] = 0
+        codes[np.isnan(price) | (codes < 0) | (codes >= len(labels))] = -1
+        filtered_viz["price_band"] = pd.Categorical.from_codes(codes, categories=labels, ordered=True)
 
         band_counts = (filtered_viz.groupby(["price_band", "style_category"])["style_cd"]
                        .count().reset_index().rename(columns={"style_cd": "styles"}))
@@ -842,12 +888,12 @@ with tab_pricing:
         st.info("No selling_price column.")
 
 # ---- Style Drilldown ----
-with tab_drill:
+if active_tab == "Style Search":
     st.subheader("Style Drilldown")
 
     q = st.text_input("Search style_cd")
     if q:
-        qdf = filtered[filtered["style_cd"].str.contains(q.strip().upper(), na=False)]
+        qdf = filtered[filtered["style_cd"].str.contains(q.strip().upper(), na=False, regex=False)]
     else:
         qdf = filtered.head(200)
 
@@ -867,19 +913,13 @@ with tab_drill:
     ]
 
     # --- Numeric formatting map ---
-    numeric_fmt = {
-        "selling_price": "${:,.2f}",
-        "metal_cost": "${:,.2f}",
-        "diamond_cost": "${:,.2f}",
-        "total_labor_cost": "${:,.2f}",
-        "melt_value": "${:,.2f}",
+    numeric_config = {
+        "selling_price": DOLLAR_COL,
+        "metal_cost": DOLLAR_COL,
+        "diamond_cost": DOLLAR_COL,
+        "total_labor_cost": DOLLAR_COL,
+        "melt_value": DOLLAR_COL,
     }
 
-    # --- Format numeric columns safely ---
-    qdf_fmt = qdf[cols].copy()
-    for col, fmt in numeric_fmt.items():
-        if col in qdf_fmt.columns:
-            qdf_fmt[col] = qdf_fmt[col].apply(lambda x: fmt.format(x) if pd.notnull(x) else "")
-
-    # --- Display formatted dataframe ---
-    st.dataframe(qdf_fmt, use_container_width=True)
+    # --- Display dataframe ---
+    st.dataframe(qdf[cols], use_container_width=True, column_config=numeric_config)
@@ -3,8 +3,9 @@ from __future__ import annotations
 import re
 import numpy as np
 import pandas as pd
-import requests
+import pyarrow as pa
 import streamlit as st
+from utils.api_session import get_session
 from streamlit_auth import require_login
 
 require_login()
@@ -16,13 +17,18 @@ require_login()
 st.set_page_config(page_title="Stock Aging", page_icon="📦", layout="wide")
 st.title("📦 Stock Aging Inventory")
 
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
 @st.cache_data
 def load_stock():
-    """Load stock aging data from your protected API endpoint (JSON)."""
+    """Load stock aging data from your protected API endpoint (Arrow stream if offered, else JSON)."""
     url = "https://api.anerijewels.com/api/stock"
-    headers = {"X-API-KEY": st.secrets["API_KEY"]}
-    res = requests.get(url, headers=headers, timeout=30)
+    headers = {"Accept": f"{ARROW_STREAM}, application/json;q=0.9"}
+    res = get_session().get(url, headers=headers, timeout=30)
     res.raise_for_status()
+    if res.headers.get("Content-Type", "").startswith(ARROW_STREAM):
+        # Typed columns straight from the IPC buffer, no json.loads -> dicts -> DataFrame round-trip
+        return pa.ipc.open_stream(res.content).read_all().to_pandas()
     return pd.DataFrame(res.json())
 
 def load_stock_local():
@@ -53,30 +59,46 @@ bucket_cols = ["30-Jan", "30 - 60", "60 - 90", "90 - 180", "> 180"]
 # -----------------------------
 # Normalize numeric fields
 # -----------------------------
-_df = df_raw.copy()
-_df.columns = [c.strip() for c in _df.columns]
+@st.cache_data(show_spinner=False)
+def prepare_stock(df_raw: pd.DataFrame) -> tuple[pd.DataFrame, str]:
+    """Clean and type the raw stock table once; reruns reuse the cached result.
+
+    Also returns a content fingerprint that keys the per-filter summaries below.
+    """
+    # df_raw is a fresh frame on every call (cache_data hands out copies), so edit it in place
+    _df = df_raw
+    _df.columns = [c.strip() for c in _df.columns]
+
+    for c in [col_qty, col_cost, col_amt] + bucket_cols:
+        _df[c] = pd.to_numeric(_df[c], errors="coerce")
+
+    # If Stock missing, compute as row-wise sum of buckets
+    if _df[col_qty].isna().all() or (_df[col_qty] == 0).all():
+        _df[col_qty] = _df[bucket_cols].sum(axis=1)
 
-for c in [col_qty, col_cost, col_amt] + bucket_cols:
-    _df[c] = pd.to_numeric(_df[c], errors="coerce")
+    if col_was_dupe not in _df.columns:
+        _df[col_was_dupe] = False
 
-# If Stock missing, compute as row-wise sum of buckets
-if _df[col_qty].isna().all() or (_df[col_qty] == 0).all():
-    _df[col_qty] = _df[bucket_cols].sum(axis=1)
+    # Missing-cost helpers so the per-category summary is plain cython sums
+    cost_missing = _df[col_cost].isna()
+    _df["_cost_missing"] = cost_missing.astype("int8")
+    _df["_stock_if_missing"] = _df[col_qty].where(cost_missing, 0)
 
-if col_was_dupe not in _df.columns:
-    _df[col_was_dupe] = False
+    # Arrow-backed strings so .str.contains runs as a compiled kernel, not a Python loop
+    for c in [col_item_id, col_desc]:
+        _df[c] = _df[c].astype("string[pyarrow]")
+
+    # Low-cardinality labels as categoricals for cheap isin/groupby (always with observed=True)
+    _df[col_cat] = _df[col_cat].astype("category")
+
+    fingerprint = f"{len(_df)}:{int(pd.util.hash_pandas_object(_df, index=False).sum())}"
+    return _df, fingerprint
+
+_df, data_key = prepare_stock(df_raw)
 
 # -----------------------------
 # Filters
 # -----------------------------
-_df["Dominant_Bucket"] = (
-    _df[bucket_cols]
-    .fillna(-np.inf)      # make NaNs safe
-    .idxmax(axis=1)       # now works without warning
-    .replace(-np.inf, np.nan)  # if all were NaN, stays NaN
-)
-
-
 with st.sidebar:
     st.subheader("Filters")
     cats = sorted(_df[col_cat].dropna().unique().tolist())
@@ -88,25 +110,66 @@ with st.sidebar:
     karat_options = ["10K", "14K", "SS"]
     sel_karats = st.multiselect("Karat", karat_options)
 
-mask = pd.Series(True, index=_df.index)
-if sel_cats:
-    mask &= _df[col_cat].isin(sel_cats)
-if sel_buckets:
-    mask &= (_df[sel_buckets].sum(axis=1) > 0)
-if text_search:
-    mask &= (
-        _df[col_desc].astype(str).str.contains(text_search, case=False, na=False) |
-        _df[col_item_id].astype(str).str.contains(text_search, case=False, na=False)
+# Bounded: each distinct search text/filter combination is its own entry
+@st.cache_data(show_spinner=False, max_entries=32)
+def summarize_stock(_df: pd.DataFrame, data_key: str, sel_cats, sel_buckets, text_search,
+                    min_qty, max_qty, sel_karats) -> dict:
+    """Filter the cached frame and return only the small aggregates the page renders.
+
+    `_df` is not hashed; its content fingerprint `data_key` plus the filter values identify
+    the result, so a rerun with unchanged filters is a dict lookup instead of a pass over
+    the inventory, and new data never hits summaries of the old.
+    """
+    # Plain numpy bool mask: no index alignment or nullable-boolean handling on each &=
+    mask = np.ones(len(_df), dtype=bool)
+    if sel_cats:
+        mask &= _df[col_cat].isin(sel_cats).to_numpy()
+    if sel_buckets:
+        mask &= np.nansum(_df[list(sel_buckets)].to_numpy(dtype=float), axis=1) > 0
+    if text_search:
+        mask &= (
+            _df[col_desc].str.contains(text_search, case=False, regex=False, na=False).to_numpy(dtype=bool) |
+            _df[col_item_id].str.contains(text_search, case=False, regex=False, na=False).to_numpy(dtype=bool)
+        )
+    qty = _df[col_qty].to_numpy(dtype=float)
+    if min_qty > 0:
+        mask &= (qty >= min_qty)
+    if max_qty > 0:
+        mask &= (qty <= max_qty)
+    if sel_karats:
+        regex = "|".join(map(re.escape, sel_karats))
+        mask &= _df[col_item_id].str.contains(regex, case=False, na=False).to_numpy(dtype=bool)
+
+    # Positional take of the matching rows; with no filters active the frame is used as-is
+    idx = np.flatnonzero(mask)
+    DF = _df if len(idx) == len(_df) else _df.take(idx)
+
+    # One columnar reduction over all buckets; KPIs and the distribution table read from it
+    bucket_units = DF[bucket_cols].sum(numeric_only=True).astype(float)
+
+    by_cat = DF.groupby(col_cat, as_index=False, observed=True, sort=False).agg(
+        Units_Total=(col_qty,"sum"),
+        Units_Slow=("> 180","sum")
     )
-if min_qty > 0:
-    mask &= (_df[col_qty] >= min_qty)
-if max_qty > 0:
-    mask &= (_df[col_qty] <= max_qty)
-if sel_karats:
-    regex = "|".join(sel_karats)
-    mask &= _df[col_item_id].astype(str).str.contains(regex, case=False, na=False)
-
-DF = _df.loc[mask].copy()
+    missing_summary = DF.groupby(col_cat, observed=True).agg(
+        rows_total=("item_id","count"),
+        rows_missing_cost=("_cost_missing","sum"),
+        stock_total=(col_qty,"sum"),
+        stock_missing_cost=("_stock_if_missing","sum")
+    )
+    return {
+        "bucket_units": bucket_units,
+        "units_total": float(DF[col_qty].sum()),
+        # One partial selection serves both the top-10 panel and the top-20 deep dive
+        "top_slow": DF.nlargest(20, "> 180")[[col_item_id, col_desc, "> 180", col_qty, col_cat]],
+        "by_cat": by_cat,
+        "missing_summary": missing_summary,
+    }
+
+stats = summarize_stock(
+    _df, data_key, tuple(sel_cats), tuple(sel_buckets), text_search,
+    min_qty, max_qty, tuple(sel_karats),
+)
 
 # -----------------------------
 # Step 1: KPIs
@@ -114,9 +177,10 @@ DF = _df.loc[mask].copy()
 st.markdown("---")
 st.subheader("🔢 Key Metrics")
 
-units_total = float(DF[col_qty].sum())
-units_slow  = float(DF["> 180"].sum())
-units_fresh = float(DF[["30-Jan", "30 - 60", "60 - 90"]].sum().sum())
+bucket_units = stats["bucket_units"]
+units_total = stats["units_total"]
+units_slow  = float(bucket_units["> 180"])
+units_fresh = float(bucket_units[["30-Jan", "30 - 60", "60 - 90"]].sum())
 
 k1, k2, k3 = st.columns(3)
 with k1:
@@ -134,10 +198,7 @@ with k3:
 st.markdown("---")
 st.subheader("📊 Units Distribution by Aging Bucket")
 
-aging_units = pd.DataFrame({
-    "Aging_Bucket": bucket_cols,
-    "Units": [float(DF[b].sum()) for b in bucket_cols]
-})
+aging_units = bucket_units.rename_axis("Aging_Bucket").reset_index(name="Units")
 aging_units["% of Total"] = np.where(units_total > 0, aging_units["Units"]/units_total, 0)
 
 st.bar_chart(aging_units.set_index("Aging_Bucket")["Units"], height=300)
@@ -153,7 +214,9 @@ st.markdown("---")
 st.subheader("🐌 Slow Movers (>180d)")
 st.info(f"You have **{units_slow:,.0f} units** sitting more than 180 days.")
 
-slow_df = DF.sort_values("> 180", ascending=False).head(10)[[col_item_id,col_desc,"> 180",col_qty,col_cat]]
+top_slow = stats["top_slow"]
+
+slow_df = top_slow.head(10)[[col_item_id,col_desc,"> 180",col_qty,col_cat]]
 slow_df = slow_df.rename(columns={col_item_id:"Style Number", col_desc:"Description","> 180":"Units >180d", col_qty:"Total Units", col_cat:"Category"})
 st.dataframe(slow_df, hide_index=True)
 
@@ -163,10 +226,7 @@ st.dataframe(slow_df, hide_index=True)
 st.markdown("---")
 st.subheader("💎 Category Insights")
 
-by_cat = DF.groupby(col_cat, as_index=False).agg(
-    Units_Total=(col_qty,"sum"),
-    Units_Slow=("> 180","sum")
-)
+by_cat = stats["by_cat"]
 by_cat["% Slow"] = np.where(by_cat["Units_Total"] > 0, by_cat["Units_Slow"]/by_cat["Units_Total"],0)
 by_cat = by_cat.sort_values("% Slow", ascending=False)
 
@@ -182,12 +242,7 @@ st.dataframe(
 st.markdown("---")
 st.subheader("🚨 Missing Values by Category")
 
-missing_summary = DF.groupby(col_cat).agg(
-    rows_total=("item_id","count"),
-    rows_missing_cost=(col_cost, lambda x: x.isna().sum()),
-    stock_total=(col_qty,"sum"),
-    stock_missing_cost=(col_cost, lambda x: DF.loc[x.index, col_qty][x.isna()].sum())
-)
+missing_summary = stats["missing_summary"]
 missing_summary["% rows missing"] = (missing_summary["rows_missing_cost"]/missing_summary["rows_total"]*100).round(1)
 missing_summary["% stock missing"] = (missing_summary["stock_missing_cost"]/missing_summary["stock_total"]*100).round(1)
 
@@ -199,7 +254,7 @@ st.dataframe(missing_summary.reset_index(), hide_index=True)
 st.markdown("---")
 with st.expander("🔎 Detailed Tables"):
     st.markdown("**Top 20 Styles by >180d Units**")
-    top20 = DF.sort_values("> 180", ascending=False).head(20)[[col_item_id,col_desc,col_qty,"> 180",col_cat]]
+    top20 = top_slow[[col_item_id,col_desc,col_qty,"> 180",col_cat]]
     st.dataframe(top20
         .rename(
         columns={col_item_id:"Item_ID", 
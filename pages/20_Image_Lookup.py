@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-import requests
-import inspect
 import numpy as np
+from datetime import date
+import pyarrow as pa
+from utils.api_session import get_session
+from utils.downloads import csv_bytes
 from streamlit_auth import require_login
 
 require_login()
@@ -37,35 +39,158 @@ st.markdown("""
         max-height: 100%;
         object-fit: contain;
     }
+
+    .carousel > input,
+    .carousel > .slide {
+        display: none;
+    }
+
+    .carousel > input:checked + .slide {
+        display: block;
+    }
+
+    .carousel-nav {
+        display: flex;
+        align-items: center;
+        justify-content: space-between;
+        width: 200px;
+        margin: 0.25rem auto;
+    }
+
+    .carousel-nav label {
+        cursor: pointer;
+        padding: 0 0.75rem;
+        user-select: none;
+    }
+
+    .carousel-nav span,
+    .tile-caption {
+        font-size: 0.875rem;
+        opacity: 0.6;
+    }
     </style>
 """, unsafe_allow_html=True)
 
 
 # === Load Data ===
-@st.cache_data
+CATEGORY_COLS = (
+    "gender", "style_category", "collection", "metal_color", "center_stone_shape",
+    "diamond_type", "ring_type", "earring_type", "chain_type", "hoop_subtype",
+)
+
+# Every metadata column this page reads; the rest of the API payload is dropped at load
+META_COLS = CATEGORY_COLS + (
+    "style_cd", "image_url", "combined_text", "diamond_shapes", "diamond_qty", "diamond_wt",
+    "center_setting", "side_setting",
+)
+
+def prepare_metadata(df):
+    df = df.drop(columns=[c for c in df.columns if c not in META_COLS])
+    # Low-cardinality filter columns as categoricals: sidebar .unique()/.isin work on integer codes
+    for c in CATEGORY_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    # Text columns Arrow-backed: contiguous UTF-8 buffers for the string kernels below and a
+    # far smaller cached/persisted frame than per-cell Python str objects
+    for c in ("style_cd", "combined_text"):
+        df[c] = df[c].astype("string[pyarrow]")
+    # One uppercase blob per row so the search bar is a single literal substring scan
+    df["_search_blob"] = (df["style_cd"].fillna("") + "|" + df["combined_text"].fillna("")).str.upper()
+    # Stripped once here, so "has an image" is one Arrow length kernel
+    df["image_url"] = df["image_url"].astype("string[pyarrow]").str.strip()
+    df["_has_image"] = df["image_url"].str.len().gt(0).fillna(False).astype(bool)
+
+    # Safeguards
+    for col in ["diamond_qty", "diamond_wt"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else np.nan
+
+    # Sidebar option lists, built once per load instead of re-sorted on every rerun
+    # (categories of a freshly cast column are exactly its sorted distinct non-null values)
+    options = {
+        c: df[c].cat.categories.tolist()
+        for c in CATEGORY_COLS if c in df.columns and c != "metal_color"
+    }
+
+    # Diamond shapes as one bitmask per row (bit i = options["diamond_shapes"][i]; a handful of
+    # shapes, well under 64), so the Any/All shape filters are a single vectorized AND
+    tokens = df["diamond_shapes"].reset_index(drop=True).str.split(",").explode().str.strip()
+    options["diamond_shapes"] = sorted(t for t in tokens.dropna().unique() if t)
+    bit_of = {t: 1 << i for i, t in enumerate(options["diamond_shapes"])}
+    tokens = tokens[tokens.isin(list(bit_of))]
+    shape_bits = np.zeros(len(df), dtype=np.uint64)
+    np.bitwise_or.at(shape_bits, tokens.index.to_numpy(), tokens.map(bit_of).to_numpy(dtype=np.uint64))
+    df["_shape_bits"] = shape_bits
+
+    # Compute UX-friendly ranges (95th percentile) and hard maxima
+    qty, wt = df["diamond_qty"], df["diamond_wt"]
+    options["qty_p95"] = int(qty.quantile(0.95)) if qty.notna().any() else 0
+    options["qty_hard_max"] = int(qty.max()) if qty.notna().any() else 0
+    options["wt_p95"] = float(wt.quantile(0.95)) if wt.notna().any() else 0.0
+    options["wt_hard_max"] = float(wt.max()) if wt.notna().any() else 0.0
+    return df, options
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# Prepared catalog is pickled to disk so process restarts skip the API call and preparation.
+# Persisted caches ignore ttl, so the entry carries the day it was fetched; a stale day clears
+# the cache (one pickle on disk, not one per day).
+@st.cache_data(persist="disk", show_spinner="Loading catalog...")
 def load_metadata():
     url = "https://api.anerijewels.com/api/metadata"
-    headers = {"X-API-KEY": st.secrets["API_KEY"]}
-    res = requests.get(url, headers=headers)
+    headers = {"Accept": f"{ARROW_STREAM}, application/json;q=0.9"}
+    res = get_session().get(url, headers=headers, timeout=60)
     res.raise_for_status()
-    return pd.DataFrame(res.json())
+    if res.headers.get("Content-Type", "").startswith(ARROW_STREAM):
+        # Typed columns straight from the IPC buffer, no json.loads -> dicts -> DataFrame round-trip
+        raw = pa.ipc.open_stream(res.content).read_all().to_pandas()
+    else:
+        raw = pd.DataFrame(res.json())
+    return (date.today().isoformat(), *prepare_metadata(raw))
 
 @st.cache_data
 def load_local_metadata():
     # Fallback to local CSV for testing
     csv_path = st.secrets.get("LOCAL_METADATA_PATH", "final_tagged_with_metadata_v2.csv")
-    return pd.read_csv(csv_path)
+    return prepare_metadata(pd.read_csv(csv_path))
 
+as_of = date.today().isoformat()
+refreshed = False
 try:
     use_local_meta = st.secrets.get("USE_LOCAL_METADATA_DATA", False)
-    df = load_local_metadata() if use_local_meta else load_metadata()
+    if use_local_meta:
+        df, options = load_local_metadata()
+    else:
+        fetched_on, df, options = load_metadata()
+        if fetched_on != as_of:
+            load_metadata.clear()
+            fetched_on, df, options = load_metadata()
+            refreshed = True
 except Exception as e:
     st.error("❌ Failed to load metadata.")
     st.text(f"Error: {e}")
 
 
-def safe_image(image_url, caption=None, width=250, height=250):
-    st.image(image_url, caption=caption, width='stretch')
+# Per-style columns: distinct values gathered into lists, or the first non-null value
+LIST_COLS = ["image_url", "style_category", "diamond_shapes", "metal_color"]
+FIRST_COLS = [
+    "center_stone_shape", "center_setting", "side_setting", "combined_text",
+    "ring_type", "earring_type", "diamond_type", "diamond_wt",
+]
+
+# One catalog is live at a time, so only its grouping is worth keeping
+@st.cache_data(show_spinner=False, max_entries=1)
+def group_by_style(_df, data_key):
+    # Group all rows with an image by style_cd and gather all associated images (sorted by style_cd).
+    # Keyed on the data source; the frame itself is not hashed on every rerun
+    src = _df.loc[_df["_has_image"], ["style_cd"] + LIST_COLS + FIRST_COLS]
+    grouped = src.groupby("style_cd")[FIRST_COLS].first()
+    for col in LIST_COLS:
+        # Dedupe (style, value) pairs up front so the per-style lists need no set()/dropna() lambda
+        # (object values: a categorical column would try to cast the lists back to its categories)
+        pairs = src[["style_cd", col]].dropna().drop_duplicates().astype({col: object})
+        lists = pairs.groupby("style_cd", sort=False)[col].agg(list).reindex(grouped.index)
+        grouped[col] = [v if isinstance(v, list) else [] for v in lists]
+    return grouped.reset_index()
 
 # === Search Bar ===
 search_query = st.text_input("Search by Style Number or Description")
@@ -86,54 +211,25 @@ metal_color_map = {
     "N": "N"
 }
 
-shape_tokens = (
-    df["diamond_shapes"]
-    .dropna()
-    .str.split(",")
-    .explode()
-    .str.strip()
-    .dropna()
-    .unique()
-)
-shape_tokens = sorted(shape_tokens)
-
 ring_type = ""
 earring_type = ""
 hoop_subtype = ""
 chain_type = ""
 
-gender = st.sidebar.selectbox("Gender", [""] + sorted(df["gender"].dropna().unique()))
-style_category = st.sidebar.multiselect("Style Category", [""] + sorted(df["style_category"].dropna().unique()))
-collection = st.sidebar.selectbox("Collection", [""] + sorted(df["collection"].dropna().unique()))
+gender = st.sidebar.selectbox("Gender", [""] + options["gender"])
+style_category = st.sidebar.multiselect("Style Category", [""] + options["style_category"])
+collection = st.sidebar.selectbox("Collection", [""] + options["collection"])
 metal_color = st.sidebar.multiselect("Metal Color",[""] + list(metal_color_map.keys()))
-center_stone_shape = st.sidebar.selectbox("Center Stone Shape", [""] + sorted(df["center_stone_shape"].dropna().unique()))
+center_stone_shape = st.sidebar.selectbox("Center Stone Shape", [""] + options["center_stone_shape"])
 
-selected_shapes = st.sidebar.multiselect("Diamond Shapes", shape_tokens)
+selected_shapes = st.sidebar.multiselect("Diamond Shapes", options["diamond_shapes"])
 shape_mode = st.sidebar.radio("Match Mode for Diamond Shapes", ["Any (OR)", "All (AND)"], index=0)
-# Prepare a tokenized column (cached in-memory) for accurate matching
-if "_shape_set" not in df.columns:
-    df["_shape_set"] = (
-        df["diamond_shapes"]
-        .fillna("")
-        .apply(lambda s: set(t.strip() for t in s.split(",") if t.strip()))
-    )
-
-diamond_type = st.sidebar.selectbox("Diamond Type", [""] + sorted(df["diamond_type"].dropna().unique()))
-
-# Safeguards 
-df["diamond_qty"] = pd.to_numeric(df["diamond_qty"], errors="coerce")
-df["diamond_wt"] = pd.to_numeric(df["diamond_wt"], errors="coerce")
-
-for col in ["diamond_qty", "diamond_wt"]:
-    if col not in df.columns:
-        df[col] = np.nan
 
-# Compute UX-friendly ranges (95th percentile) and hard maxima
-qty_p95 = int(df["diamond_qty"].quantile(0.95)) if df["diamond_qty"].notna().any() else 0
-qty_hard_max = int(df["diamond_qty"].max()) if df["diamond_qty"].notna().any() else 0
+diamond_type = st.sidebar.selectbox("Diamond Type", [""] + options["diamond_type"])
 
-wt_p95 = float(df["diamond_wt"].quantile(0.95)) if df["diamond_wt"].notna().any() else 0.0
-wt_hard_max = float(df["diamond_wt"].max()) if df["diamond_wt"].notna().any() else 0.0
+# UX-friendly ranges (95th percentile) and hard maxima, computed in the cached loader
+qty_p95, qty_hard_max = options["qty_p95"], options["qty_hard_max"]
+wt_p95, wt_hard_max = options["wt_p95"], options["wt_hard_max"]
 
 # track when the advanced checkbox toggles, so we can reset defaults cleanly
 def toggled(key, default=False):
@@ -243,16 +339,16 @@ ring_type = []
 earring_type = []
 
 if any(cat in style_category for cat in ["NECKLACE", "BRACELET", "ANKLET"]):
-    chain_type = st.sidebar.multiselect("Chain Type", [""] + sorted(df["chain_type"].dropna().unique()))
+    chain_type = st.sidebar.multiselect("Chain Type", [""] + options["chain_type"])
 
 if "RING" in style_category:
-    ring_type = st.sidebar.multiselect("Ring Type", sorted(df["ring_type"].dropna().unique()))
+    ring_type = st.sidebar.multiselect("Ring Type", options["ring_type"])
 
 if "EARRING" in style_category:
-    earring_type = st.sidebar.multiselect("Earring Type", sorted(df["earring_type"].dropna().unique()))
+    earring_type = st.sidebar.multiselect("Earring Type", options["earring_type"])
 
 if "Hoop" in earring_type:
-    hoop_subtype = st.sidebar.multiselect("Hoop Subtype", [""] + sorted(df["hoop_subtype"].dropna().unique()))
+    hoop_subtype = st.sidebar.multiselect("Hoop Subtype", [""] + options["hoop_subtype"])
 
 st.sidebar.markdown("### 🛒 Cart")
 
@@ -265,7 +361,7 @@ if st.session_state.image_cart:
     
     # Download cart CSV
     cart_df = pd.DataFrame(st.session_state.image_cart)
-    st.sidebar.download_button("📥 Download Cart", cart_df.to_csv(index=False), file_name="cart_items.csv", mime="text/csv")
+    st.sidebar.download_button("📥 Download Cart", csv_bytes(cart_df), file_name="cart_items.csv", mime="text/csv")
 else:
     st.sidebar.caption("Cart is empty.")
 
@@ -276,94 +372,93 @@ st.sidebar.markdown(
 )
 
 # === Step 1: Apply search and filters ===
-filtered_df = df.copy()
-
-if search_query:
-    q = search_query.upper()
-    filtered_df = filtered_df[
-        filtered_df["combined_text"].str.contains(q, na=False) |
-        filtered_df["style_cd"].str.upper().str.contains(q, na=False)
-    ]
-
-
-# ==== Apply filters ====
-# (Fill NaNs to be inclusive of lower bounds)
-filtered_df = filtered_df[
-    filtered_df["diamond_qty"].fillna(0).between(qty_min, qty_max)
-]
-filtered_df = filtered_df[
-    filtered_df["diamond_wt"].fillna(0.0).between(wt_min, wt_max)
-]
-if gender:
-    filtered_df = filtered_df[filtered_df["gender"] == gender]
-if style_category:
-    filtered_df = filtered_df[filtered_df["style_category"].isin(style_category)]
-
-if collection:
-    filtered_df = filtered_df[filtered_df["collection"] == collection]
-
-if metal_color:
-    selected_codes = [metal_color_map[color] for color in metal_color]
-    filtered_df = filtered_df[filtered_df["metal_color"].isin(selected_codes)]
-
-if center_stone_shape:
-    filtered_df = filtered_df[filtered_df["center_stone_shape"] == center_stone_shape]
-
-if selected_shapes:
-    sel_set = set(selected_shapes)
-    if shape_mode == "Any (OR)":
-        mask = df["_shape_set"].apply(lambda s: bool(s & sel_set))      # intersection non-empty
-    else:  # "All (AND)"
-        mask = df["_shape_set"].apply(lambda s: sel_set.issubset(s))    # all selected present
-    filtered_df = df[mask]
-
-if ring_type:
-    filtered_df = filtered_df[filtered_df["ring_type"].isin(ring_type)]
-
-if earring_type:
-    filtered_df = filtered_df[filtered_df["earring_type"].isin(earring_type)]
-
-if diamond_type:
-    filtered_df = filtered_df[filtered_df["diamond_type"] == diamond_type]
-
-if chain_type:
-    filtered_df = filtered_df[filtered_df["chain_type"].isin(chain_type)]
-
-if hoop_subtype:
-    filtered_df = filtered_df[filtered_df["hoop_subtype"].isin(hoop_subtype)]
-
-
-# === Step 2: Drop rows with bad image_url only
-filtered_df = filtered_df[
-    filtered_df["image_url"].notna() &
-    filtered_df["image_url"].astype(str).str.strip().ne("")
-]
-
-# Group all rows by style_cd and gather all associated images
-grouped_df = (
-    filtered_df
-    .groupby("style_cd")
-    .agg({
-        "image_url": lambda x: list(x.dropna().unique()),
-        "style_category": lambda x: list(set(x.dropna())),
-        "center_stone_shape": "first",
-        "diamond_shapes": lambda x: list(set(x.dropna())),
-        "metal_color": lambda x: list(set(x.dropna())),
-        "center_setting": "first",
-        "side_setting": "first",
-        "combined_text": "first",
-        "ring_type": "first",
-        "earring_type": "first",
-        "diamond_type": "first",
-        "diamond_wt": "first"
-    })
-    .reset_index()
+# Bounded: every distinct query/filter combination would otherwise keep its positions array forever
+@st.cache_data(show_spinner=False, max_entries=32)
+def match_styles(_df, _grouped, data_key, search_query, qty_range, wt_range, gender, style_category, collection,
+                 metal_codes, center_stone_shape, shape_bits, shape_mode, ring_type, earring_type,
+                 diamond_type, chain_type, hoop_subtype):
+    """
+    Filter the metadata rows and return (matching row count, positions of the matching styles in _grouped).
+    Keyed on the filter values only (the frames are skipped by the hasher), so page flips and
+    carousel clicks with unchanged filters are a cache hit.
+    """
+    df = _df
+    # One fused numpy mask over the cached frame
+    mask = np.ones(len(df), dtype=bool)
+
+    if search_query:
+        q = search_query.upper()
+        mask &= df["_search_blob"].str.contains(q, na=False, regex=False).to_numpy(dtype=bool)
+
+    # (Fill NaNs to be inclusive of lower bounds)
+    mask &= df["diamond_qty"].fillna(0).between(*qty_range).to_numpy()
+    mask &= df["diamond_wt"].fillna(0.0).between(*wt_range).to_numpy()
+
+    if gender:
+        mask &= (df["gender"] == gender).to_numpy()
+    if style_category:
+        mask &= df["style_category"].isin(style_category).to_numpy()
+
+    if collection:
+        mask &= (df["collection"] == collection).to_numpy()
+
+    if metal_codes:
+        mask &= df["metal_color"].isin(metal_codes).to_numpy()
+
+    if center_stone_shape:
+        mask &= (df["center_stone_shape"] == center_stone_shape).to_numpy()
+
+    if shape_bits:
+        sel = np.uint64(shape_bits)
+        hit = df["_shape_bits"].to_numpy() & sel
+        if shape_mode == "Any (OR)":
+            mask &= hit != 0      # intersection non-empty
+        else:  # "All (AND)"
+            mask &= hit == sel    # all selected present
+
+    if ring_type:
+        mask &= df["ring_type"].isin(ring_type).to_numpy()
+
+    if earring_type:
+        mask &= df["earring_type"].isin(earring_type).to_numpy()
+
+    if diamond_type:
+        mask &= (df["diamond_type"] == diamond_type).to_numpy()
+
+    if chain_type:
+        mask &= df["chain_type"].isin(chain_type).to_numpy()
+
+    if hoop_subtype:
+        mask &= df["hoop_subtype"].isin(hoop_subtype).to_numpy()
+
+    # Drop rows with bad image_url only
+    has_image = df["_has_image"].to_numpy()
+    mask &= has_image
+
+    # Nothing filtered out beyond the image check: every grouped style matches, skip the isin
+    if np.array_equal(mask, has_image):
+        return int(mask.sum()), np.arange(len(_grouped))
+
+    # Only the positions of the matching styles are kept; rows are materialized for the current page alone
+    matching_styles = df["style_cd"].to_numpy()[mask]
+    style_pos = np.flatnonzero(_grouped["style_cd"].isin(matching_styles).to_numpy())
+    return int(mask.sum()), style_pos
+
+
+# === Step 2: Group + match
+data_key = "local" if use_local_meta else f"api:{fetched_on}"
+if refreshed:
+    # Entries derived from the previous day's catalog can never be hit again
+    group_by_style.clear()
+    match_styles.clear()
+full_grouped = group_by_style(df, data_key)
+n_matches, style_pos = match_styles(
+    df, full_grouped, data_key, search_query, (qty_min, qty_max), (wt_min, wt_max),
+    gender, tuple(style_category), collection, tuple(metal_color_map[color] for color in metal_color),
+    center_stone_shape, sum(1 << options["diamond_shapes"].index(t) for t in selected_shapes), shape_mode, tuple(ring_type), tuple(earring_type),
+    diamond_type, tuple(chain_type), tuple(hoop_subtype),
 )
 
-
-grouped_df["sort_key"] = grouped_df["style_cd"]
-grouped_df = grouped_df.sort_values("sort_key").reset_index(drop=True)
-
 def render_pagination(page_num, total_pages, label):
     return st.number_input(
         label,
@@ -375,9 +470,9 @@ def render_pagination(page_num, total_pages, label):
     )
 
 # === Step 4: Pagination
-if len(grouped_df) > 0:
+if len(style_pos) > 0:
     PAGE_SIZE = 24
-    total_pages = (len(grouped_df) - 1) // PAGE_SIZE + 1
+    total_pages = (len(style_pos) - 1) // PAGE_SIZE + 1
     # Top pagination
     page_num = render_pagination(st.session_state.get("page_num", 1), total_pages, "Page")
 
@@ -385,10 +480,10 @@ if len(grouped_df) > 0:
     st.session_state.page_num = page_num
     start_idx = (page_num - 1) * PAGE_SIZE
     end_idx = start_idx + PAGE_SIZE
-    page_df = grouped_df.iloc[start_idx:end_idx]
+    page_df = full_grouped.take(style_pos[start_idx:end_idx])
 
     # === Step 5: Display results
-    st.write(f"**Found {len(filtered_df)} matching visuals**")
+    st.write(f"**Found {n_matches} matching visuals**")
 
     def to_multiline(val):
         if isinstance(val, list):
@@ -400,59 +495,79 @@ if len(grouped_df) > 0:
             return " / ".join(val)
         return val
 
-    cols = st.columns(4)
-    for i, row in page_df.iterrows():
-        style_key = row["style_cd"]
-        images = row["image_url"]
-        session_key = f"carousel_idx_{style_key}"
-
-        # Init index
-        if session_key not in st.session_state:
-            st.session_state[session_key] = 0
-
-        idx = st.session_state[session_key]
-
-        with cols[i % 4]:
-            # === Image
-            st.markdown(f'''
-                <div class="image-box">
-                    <img src="{images[idx]}" alt="Style image">
-                </div>
-            ''', unsafe_allow_html=True)
-
-            # === Arrow Buttons in 3 Columns (left, center, right)
-            col1, col2, col3 = st.columns([1, 2, 1])
-            with col1:
-                if st.button("◀", key=f"prev_{style_key}"):
-                    st.session_state[session_key] = (idx - 1) % len(images)
-                    st.rerun()
-            with col3:
-                if st.button("▶", key=f"next_{style_key}"):
-                    st.session_state[session_key] = (idx + 1) % len(images)
-                    st.rerun()
-
-            # === Index Indicator and metadata
-            st.caption(f"{idx + 1} / {len(images)}")
-                        # === Add to Cart button
-            if st.button("🛒 Add to Cart", key=f"add_cart_{style_key}"):
-                already_in_cart = any(item['style_cd'] == style_key for item in st.session_state.image_cart)
-                if not already_in_cart:
-                    st.session_state.image_cart.append({
-                        "style_cd": style_key,
-                        "image_url": images[idx],
-                        "style_category": to_slash(row['style_category']),
-                        "center_stone_shape": to_slash(row['center_stone_shape']),
-                        "metal_color": to_slash(row['metal_color']),
-                        "combined_text": row.get("combined_text", ""),
-                        "ring_type": to_slash(row.get('ring_type', '')),
-                        "earring_type": to_slash(row.get('earring_type', '')),
-                        "center_stone_shape": to_slash(row.get('center_stone_shape', '')),
-                        "diamond_type": to_slash(row.get('diamond_type', ''))
-                    })
-                    st.success(f"Added {style_key} to cart.")
-                    st.rerun()
-
-            st.markdown("**Styles:**<br>" + to_multiline(row["style_cd"]), unsafe_allow_html=True)
-            st.caption(f"{to_slash(row['style_category'])} | {to_slash(row['center_stone_shape'])} | {to_slash(row['diamond_wt'])} | {to_slash(row['metal_color'])}")
+    # Resize query for the image host (e.g. "w=400&auto=format"); tiles are ~300px wide, so a
+    # thumbnail is all the grid needs. Empty keeps the original URLs; the cart always stores those.
+    thumb_query = st.secrets.get("IMAGE_THUMB_QUERY", "")
+
+    def thumb(url):
+        if not thumb_query:
+            return url
+        return f"{url}{'&' if '?' in url else '?'}{thumb_query}"
+
+    def carousel_html(tile, images, eager):
+        # Pure-CSS carousel: one hidden radio per image; the checked radio's slide is shown and its
+        # arrow labels check the neighbouring radios, so flipping images never reruns the script
+        n = len(images)
+        slides = []
+        for k, url in enumerate(images):
+            loading = 'loading="eager"' if eager and k == 0 else 'loading="lazy" fetchpriority="low"'
+            slides.append(
+                f'<input type="radio" name="car-{tile}" id="car-{tile}-{k}"{" checked" if k == 0 else ""}>'
+                f'<div class="slide"><div class="image-box">'
+                f'<img src="{thumb(url)}" {loading} decoding="async" alt="Style image"></div>'
+                f'<div class="carousel-nav"><label for="car-{tile}-{(k - 1) % n}">◀</label>'
+                f'<span>{k + 1} / {n}</span><label for="car-{tile}-{(k + 1) % n}">▶</label></div></div>'
+            )
+        return f'<div class="carousel">{"".join(slides)}</div>'
+
+    # Plain dicts per tile: no pd.Series built for every row of the page
+    records = page_df.to_dict("records")
+
+    # One form for the whole grid: ticking tiles doesn't rerun the script, a single submit adds them all
+    with st.form("cart_form", clear_on_submit=True, border=False):
+        cols = st.columns(4)
+        picked = {}
+        for i, row in enumerate(records):
+            style_key = row["style_cd"]
+
+            with cols[i % 4]:
+                # === Image carousel with its arrows and index indicator (first row loads eagerly)
+                st.markdown(carousel_html(i, row["image_url"], eager=i < 4), unsafe_allow_html=True)
+
+                # === Add to Cart checkbox
+                picked[style_key] = st.checkbox("🛒 Add to Cart", key=f"add_cart_{style_key}")
+
+                # Style label + attribute line as one element instead of a markdown and a caption
+                st.markdown(
+                    "**Styles:**<br>" + to_multiline(row["style_cd"]) +
+                    f"<div class='tile-caption'>{to_slash(row['style_category'])} | {to_slash(row['center_stone_shape'])} | "
+                    f"{to_slash(row['diamond_wt'])} | {to_slash(row['metal_color'])}</div>",
+                    unsafe_allow_html=True,
+                )
+
+        submitted = st.form_submit_button("🛒 Add selected to cart")
+
+    if submitted:
+        in_cart = {item["style_cd"] for item in st.session_state.image_cart}
+        new_items = [
+            {
+                "style_cd": row["style_cd"],
+                # Every image of the style: the carousel rotates client-side, so which one was showing is unknown
+                "image_url": to_slash(row["image_url"]),
+                "style_category": to_slash(row['style_category']),
+                "center_stone_shape": to_slash(row.get('center_stone_shape', '')),
+                "metal_color": to_slash(row['metal_color']),
+                "combined_text": row.get("combined_text", ""),
+                "ring_type": to_slash(row.get('ring_type', '')),
+                "earring_type": to_slash(row.get('earring_type', '')),
+                "diamond_type": to_slash(row.get('diamond_type', ''))
+            }
+            for row in records
+            if picked[row["style_cd"]] and row["style_cd"] not in in_cart
+        ]
+        if new_items:
+            st.session_state.image_cart.extend(new_items)
+            # Sidebar cart was drawn earlier in this run; rerun once to show the additions
+            st.rerun()
 else:
     st.warning(f"No results found. Try a different search.")
\ No newline at end of file
@@ -1,6 +1,8 @@
+import io
 import streamlit as st
 import requests
-from PIL import Image
+from PIL import Image, ImageOps, UnidentifiedImageError
+from utils.api_session import get_session
 from streamlit_auth import require_login
 
 require_login()
@@ -13,6 +15,35 @@ st.set_page_config(
 )
 st.title("🔍 Reverse Image Search")
 
+def shrink_for_search(data: bytes, max_side: int = 512) -> bytes:
+    """Downscale + re-encode as JPEG; the embedding model only sees a small crop anyway."""
+    img = Image.open(io.BytesIO(data))
+    # Bake in the EXIF rotation; the JPEG re-encode drops the Orientation tag
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    else:
+        img = img.convert("RGB")
+    img.thumbnail((max_side, max_side), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=85, optimize=True)
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=64)
+def search_similar(payload: bytes):
+    # Keyed on the shrunk image bytes, so re-uploading the same picture reuses the results;
+    # the ttl picks up server-side index changes, max_entries bounds the stored queries
+    response = get_session().post(
+        "https://api.anerijewels.com/api/image-search",
+        files={"file": ("query.jpg", payload, "image/jpeg")},
+        timeout=60
+    )
+    response.raise_for_status()
+    return response.json()["results"]
+
 # === Upload ===
 uploaded_file = st.file_uploader("Upload an image", type=["jpg", "jpeg", "png"])
 
@@ -23,14 +54,7 @@ if uploaded_file:
     # Send image to API
     with st.spinner("Searching..."):
         try:
-            response = requests.post(
-                "https://api.anerijewels.com/api/image-search",
-                files={"file": uploaded_file.getvalue()},
-                headers = {"X-API-KEY": st.secrets["API_KEY"]},
-                timeout=60
-            )
-            response.raise_for_status()
-            results = response.json()["results"]
+            results = search_similar(shrink_for_search(uploaded_file.getvalue()))
 
             st.subheader("Top Matches")
 
@@ -47,3 +71,6 @@ if uploaded_file:
 
         except requests.exceptions.RequestException as e:
             st.error(f"API Error: {e}")
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+            # Corrupt, mislabeled or oversized (decompression bomb) uploads
+            st.error(f"Could not read the uploaded image: {e}")
@@ -1,5 +1,6 @@
 # streamlit_auth.py
 
+import time
 import streamlit as st
 from jose import jwt, JWTError
 import requests
@@ -19,6 +20,7 @@ def login_form():
                 token = res.json()["access_token"]
                 st.session_state["token"] = token
                 payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+                st.session_state["_jwt_cache"] = (token, payload)
                 st.session_state["user"] = payload["sub"]
                 st.session_state["role"] = payload["role"]
                 st.rerun()
@@ -30,14 +32,23 @@ def require_login():
         st.warning("Please log in to access this page.")
         login_form()
         st.stop()
-    # Optional: auto-logout on expired token
+    # Optional: auto-logout on expired token.
+    # The signature is verified once per token; later reruns only compare the cached exp.
+    token = st.session_state["token"]
+    cached = st.session_state.get("_jwt_cache")
     try:
-        jwt.decode(st.session_state["token"], SECRET_KEY, algorithms=[ALGORITHM])
+        if cached is None or cached[0] != token:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            st.session_state["_jwt_cache"] = (token, payload)
+        else:
+            payload = cached[1]
+        if "exp" in payload and payload["exp"] <= time.time():
+            raise JWTError("Signature has expired.")
     except JWTError:
         st.session_state.clear()
         st.error("Session expired. Please log in again.")
         st.stop()
 
 def logout():
-    for key in ("token", "user", "role"):
+    for key in ("token", "user", "role", "_jwt_cache"):
         st.session_state.pop(key, None)
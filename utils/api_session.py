@@ -0,0 +1,16 @@
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+@st.cache_resource
+def get_session():
+    # One keep-alive session per server process, so API calls reuse the TCP/TLS connection
+    session = requests.Session()
+    # Transient gateway errors on GETs are retried with a short backoff; POSTs are never replayed.
+    # No read retries: a stalled response would otherwise cost several full timeouts
+    retry = Retry(total=3, connect=1, read=0, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+                  allowed_methods=frozenset({"GET"}))
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
+    session.headers.update({"X-API-KEY": st.secrets["API_KEY"]})
+    return session
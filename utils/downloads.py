@@ -0,0 +1,7 @@
+import pandas as pd
+import streamlit as st
+
+@st.cache_data(show_spinner=False)
+def csv_bytes(df: pd.DataFrame) -> bytes:
+    # Download buttons rebuild their payload on every rerun; cache the encoded CSV per frame
+    return df.to_csv(index=False).encode("utf-8")
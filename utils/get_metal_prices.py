@@ -1,13 +1,64 @@
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 METALPRICE_API_KEY = st.secrets.get("METALPRICE_API_KEY")
 
-@st.cache_data(ttl=86400)  # cache for 12 hours
-def get_metal_prices():
+# Last successful response. While fresh it is served without an HTTP call (so process restarts
+# stay warm), and past that it still backs the navbar while the price API is down
+LAST_GOOD_PATH = Path(tempfile.gettempdir()) / "metal_prices.json"
+FRESH_SECONDS = 43200  # 12 hours
+# After a failed fetch, skip the API entirely for this long and serve the last-good file
+FAILURE_BACKOFF_SECONDS = 300
+_last_failure = {"at": 0.0}
+
+@st.cache_resource
+def _session():
+    # Separate from utils.api_session: that one carries our API key, which must not go to a third party
+    session = requests.Session()
+    # No read retries: one slow response must not be multiplied by the retry count
+    retry = Retry(total=3, connect=1, read=0, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+    session.mount("https://", HTTPAdapter(max_retries=retry))
+    return session
+
+@st.cache_data(ttl=FRESH_SECONDS)
+def _fetch_rates():
+    try:
+        if time.time() - LAST_GOOD_PATH.stat().st_mtime < FRESH_SECONDS:
+            return json.loads(LAST_GOOD_PATH.read_text())
+    except (OSError, ValueError):
+        pass  # missing or unreadable file: fetch below
     url = f"https://api.metalpriceapi.com/v1/latest?api_key={METALPRICE_API_KEY}&base=USD&currencies=XAG,XAU,XPT,XPD"
-    response = requests.get(url)
+    # (connect, read) timeouts so a stalled upstream can't hang the page
+    response = _session().get(url, timeout=(3, 5))
     data = response.json()
     if not data.get("success"):
         raise Exception("Failed to fetch metal prices")
+    # Write-then-rename so concurrent readers never see a half-written file
+    tmp = LAST_GOOD_PATH.with_name(f"{LAST_GOOD_PATH.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data["rates"]))
+    os.replace(tmp, LAST_GOOD_PATH)
     return data["rates"]
+
+def _last_good():
+    if LAST_GOOD_PATH.exists():
+        return json.loads(LAST_GOOD_PATH.read_text())
+    raise Exception("Failed to fetch metal prices")
+
+def get_metal_prices():
+    # Failures are raised out of the cached fetch rather than cached for the full TTL; the
+    # process then stays off the API for a short backoff and shows the last known rates
+    if time.time() - _last_failure["at"] < FAILURE_BACKOFF_SECONDS:
+        return _last_good()
+    try:
+        return _fetch_rates()
+    except Exception:
+        _last_failure["at"] = time.time()
+        return _last_good()